@@ -0,0 +1,103 @@
+"""
+Sync (WSGI-style, thread pool) vs. native async quiz submissions.
+
+Seeds a question bank and N logged-in players, then has every player load the
+quiz and submit it at once: the sync views are driven from a thread pool sized
+like a threaded WSGI server, the async views as N concurrent coroutines on one
+event loop (the ASGI handler, in process, no network):
+
+    python benchmarks/async_submissions.py --submitters 1000 --threads 32
+"""
+import argparse
+import asyncio
+import importlib
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import harness
+
+harness.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+from django.urls import clear_url_caches  # noqa: E402
+
+from quizapp import urls as quiz_urls  # noqa: E402
+from quizapp.models import Player, Question  # noqa: E402
+from quizapp.question_bank import bump_version  # noqa: E402
+
+QUIZ_URL = '/quiz/quiz/'
+
+
+def route_async_views(enabled):
+    with override_settings(QUIZ_ASYNC_VIEWS=enabled):
+        importlib.reload(quiz_urls)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+
+def sync_flow(client):
+    started = time.perf_counter()
+    response = client.post(QUIZ_URL, harness.quiz_answers(client.get(QUIZ_URL)))
+    assert response.status_code == 200, response.status_code
+    return time.perf_counter() - started
+
+
+async def async_flow(client):
+    started = time.perf_counter()
+    response = await client.post(QUIZ_URL, harness.quiz_answers(await client.get(QUIZ_URL)))
+    assert response.status_code == 200, response.status_code
+    return time.perf_counter() - started
+
+
+def report(label, latencies, elapsed):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:>6}: {len(latencies) / elapsed:7.0f} submissions/s  "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--submitters', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    with harness.test_database():
+        Question.objects.bulk_create(
+            Question(text=f'Q{i}', option_a='a', option_b='b', correct='A') for i in range(500)
+        )
+        bump_version()
+        User.objects.bulk_create(User(username=f'bench{i}') for i in range(args.submitters))
+        users = list(User.objects.all())
+        Player.objects.bulk_create(Player(user=user) for user in users)
+
+        route_async_views(False)
+        clients = []
+        for user in users:
+            clients.append(Client())
+            clients[-1].force_login(user)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            latencies = list(pool.map(sync_flow, clients))
+        report('sync', latencies, time.perf_counter() - started)
+
+        route_async_views(True)
+        clients = []
+        for user in users:
+            clients.append(AsyncClient())
+            clients[-1].force_login(user)
+
+        async def run_all():
+            return await asyncio.gather(*(async_flow(client) for client in clients))
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run_all())
+        report('async', latencies, time.perf_counter() - started)
+        route_async_views(False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Process boot time and memory per settings profile.
+
+Each run starts a fresh interpreter that loads the application the way the
+profile's processes do (``myapp.wsgi`` for dev and prod, ``django.setup()``
+plus the job registry for worker) and reports the time that took, its RSS
+and the number of imported modules:
+
+    python benchmarks/boot.py --runs 5 --workers 4
+
+The fork test then boots the prod profile with and without ``QUIZ_PRELOAD``,
+forks ``--workers`` children and lets each one do what a fresh web worker
+does before its first response (import every view, compile every
+template). It reports the memory private to each child, read from
+/proc/self/smaps_rollup, so it needs Linux. Shared copy-on-write pages are
+the saving. No database is opened.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def private_kb():
+    total = 0
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total += int(line.split()[1])
+    return total
+
+
+def boot(profile):
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myapp.settings')
+    if profile == 'worker':
+        import django
+        django.setup()
+        from quizapp import jobs  # noqa: F401
+    else:
+        import myapp.wsgi  # noqa: F401
+    return time.perf_counter() - started
+
+
+def warm_worker():
+    # The first-request work a worker does when the master did not preload.
+    from django.template import engines
+    from django.urls import get_resolver
+
+    from quizapp.preload import _template_names
+
+    get_resolver().url_patterns
+    for name in _template_names():
+        engines['django'].get_template(name)
+
+
+def child(profile, workers):
+    elapsed = boot(profile)
+    result = {'boot_ms': elapsed * 1000, 'rss_mb': rss_kb() / 1024, 'modules': len(sys.modules)}
+    if workers:
+        private = []
+        for _ in range(workers):
+            read, write = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(read)
+                warm_worker()
+                os.write(write, str(private_kb()).encode())
+                os._exit(0)
+            os.close(write)
+            with os.fdopen(read) as f:
+                private.append(int(f.read()))
+            os.waitpid(pid, 0)
+        result['private_mb'] = statistics.mean(private) / 1024
+    print(json.dumps(result))
+
+
+def spawn(profile, preload=None, workers=0):
+    # Let the profile pick its own template, static and preload settings.
+    env = {key: value for key, value in os.environ.items()
+           if key not in ('QUIZ_TEMPLATE_PROFILE', 'QUIZ_STATIC_PROFILE', 'QUIZ_PRELOAD')}
+    env.update(QUIZ_PROFILE=profile, DJANGO_SECRET_KEY='benchmark')
+    if preload is not None:
+        env['QUIZ_PRELOAD'] = '1' if preload else '0'
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', profile, '--workers', str(workers)],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def median(runs, key):
+    return statistics.median(run[key] for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.workers)
+
+    for profile in ('dev', 'prod', 'worker'):
+        runs = [spawn(profile) for _ in range(args.runs)]
+        print(f"{profile:>8}: boot {median(runs, 'boot_ms'):7.1f} ms  "
+              f"RSS {median(runs, 'rss_mb'):6.1f} MB  {median(runs, 'modules'):5.0f} modules")
+
+    print(f"\nprod, {args.workers} forked workers after their first-request warm-up:")
+    for preload in (False, True):
+        runs = [spawn('prod', preload, args.workers) for _ in range(args.runs)]
+        print(f"  preload {'on ' if preload else 'off'}: master boot {median(runs, 'boot_ms'):7.1f} ms  "
+              f"private {median(runs, 'private_mb'):5.1f} MB per worker")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Latency regression suite for the user-facing quiz flows.
+
+Seeds a test database with N players and N questions for each ``--scale``
+(1k, 100k, 1m), then drives registration, login, quiz GET/POST and the admin
+question list/search through the Django test client from ``--concurrency``
+threads. For every flow it records p50/p99 latency, throughput and DB queries
+per request, and compares them with the baseline JSON:
+
+    python benchmarks/flows.py --scale 1k --scale 100k          # compare
+    python benchmarks/flows.py --scale 1k --save                # new baseline
+
+The run exits with status 1 when a flow's p50 or p99 grows, or its throughput
+drops, by more than ``--threshold`` (a fraction, default 0.25), or when it
+issues at least half a query per request more than the baseline. Throughput
+is requests per second of busy time per thread, so the untimed GET that
+precedes each quiz POST does not count against it. Timings are only
+comparable between runs on the same machine, so no baseline is committed:
+record one on the CI runner with ``--save`` (for every scale and flow the
+job compares) and keep it there, passing its path with ``--baseline``. A
+compare also fails when the baseline file is missing or has no entry for a
+flow that was run, so a gate without a baseline cannot pass silently.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+
+import harness
+
+harness.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from quizapp.models import Player, Question  # noqa: E402
+from quizapp.question_bank import bump_version  # noqa: E402
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+PASSWORD = 'bench-pass'
+BATCH = 5000
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+# ---------------------- Seeding ----------------------
+
+def seed(rows):
+    """Players ``player0..`` (password PASSWORD), one admin and ``rows`` questions."""
+    password = make_password(PASSWORD)
+    for start in range(0, rows, BATCH):
+        users = User.objects.bulk_create(
+            User(username=f'player{i}', password=password) for i in range(start, min(start + BATCH, rows))
+        )
+        Player.objects.bulk_create(Player(user=user, display_name=user.username) for user in users)
+    for start in range(0, rows, BATCH):
+        Question.objects.bulk_create(
+            Question(text=f'Question {i} about topic{i % 100}', option_a='a', option_b='b',
+                     option_c='c', option_d='d', correct='ABCD'[i % 4])
+            for i in range(start, min(start + BATCH, rows))
+        )
+    User.objects.create_user('bench-admin', password=PASSWORD, is_staff=True)
+    bump_version()
+
+
+# ---------------------- Flows ----------------------
+
+def expect(response, *codes):
+    assert response.status_code in codes, response.status_code
+    return response
+
+
+def player_client(rows, worker):
+    client = Client()
+    client.force_login(User.objects.get(username=f'player{worker % rows}'))
+    return client
+
+
+def admin_client(rows, worker):
+    client = Client()
+    client.force_login(User.objects.get(username='bench-admin'))
+    return client
+
+
+def register(client, i):
+    expect(client.post(reverse('quizapp:player_register'), {
+        'username': f'new{i}', 'email': f'new{i}@example.com', 'password': PASSWORD,
+    }), 302)
+
+
+def login(client, i):
+    expect(client.post(reverse('quizapp:player_login'), {
+        'username': f'player{i}', 'password': PASSWORD,
+    }), 302)
+
+
+def quiz_get(client):
+    expect(client.get(reverse('quizapp:quiz_page')), 200)
+
+
+def take_quiz(client, i):
+    return (harness.quiz_answers(expect(client.get(reverse('quizapp:quiz_page')), 200)),)
+
+
+def quiz_post(client, answers):
+    expect(client.post(reverse('quizapp:quiz_page'), answers), 200)
+
+
+def question_page(rows):
+    def request(client, i):
+        expect(client.get(reverse('quizapp:questions_list'), {'after': random.randrange(rows)}), 200)
+    return request
+
+
+def search(client, i):
+    expect(client.get(reverse('quizapp:search_questions'), {'q': f'topic{i % 100}'}), 200)
+
+
+def flows(rows):
+    """name -> (client factory, timed request, untimed prepare)."""
+    anonymous = lambda rows, worker: Client()  # noqa: E731
+    return {
+        'register': (anonymous, register, lambda client, i: (i,)),
+        'login': (anonymous, login, lambda client, i: (i % rows,)),
+        'quiz_get': (player_client, quiz_get, None),
+        'quiz_post': (player_client, quiz_post, take_quiz),
+        'admin_list': (admin_client, question_page(rows), lambda client, i: (i,)),
+        'admin_search': (admin_client, search, lambda client, i: (i,)),
+    }
+
+
+def run_flow(rows, make_client, request, prepare, requests, concurrency):
+    clients = [make_client(rows, worker) for worker in range(concurrency)]
+    result = harness.run_load(clients, request, requests, prepare)
+    busy = sum(result.latencies) / concurrency
+    return {
+        'p50_ms': round(statistics.median(result.latencies) * 1000, 3),
+        'p99_ms': round(harness.percentile(result.latencies, 0.99) * 1000, 3),
+        'throughput_rps': round(requests / busy, 1),
+        'queries_per_request': round(result.queries / requests, 2),
+    }
+
+
+# ---------------------- Baseline ----------------------
+
+def regressions(current, baseline, threshold):
+    """Yield a message for every metric that is worse than the baseline allows."""
+    for flow, now in current.items():
+        base = baseline.get(flow)
+        if base is None:
+            yield f"{flow}: not in the baseline; record it with --save"
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if now[metric] > base[metric] * (1 + threshold):
+                yield f"{flow}: {metric} {base[metric]} -> {now[metric]}"
+        if now['throughput_rps'] < base['throughput_rps'] / (1 + threshold):
+            yield f"{flow}: throughput_rps {base['throughput_rps']} -> {now['throughput_rps']}"
+        if now['queries_per_request'] >= base['queries_per_request'] + 0.5:
+            yield f"{flow}: queries_per_request {base['queries_per_request']} -> {now['queries_per_request']}"
+
+
+def report(scale, results):
+    print(f"[{scale}]")
+    for flow, r in results.items():
+        print(f"{flow:>13}: p50 {r['p50_ms']:8.1f} ms  p99 {r['p99_ms']:8.1f} ms  "
+              f"{r['throughput_rps']:7.0f} req/s  {r['queries_per_request']:5.2f} queries/req")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', action='append', choices=SCALES,
+                        help="Dataset size; repeat for several (default: 1k).")
+    parser.add_argument('--flow', action='append', help="Run only these flows.")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per flow.")
+    parser.add_argument('--concurrency', type=int, default=4, help="Client threads per flow.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed relative slowdown before a flow fails (default: 0.25).")
+    parser.add_argument('--save', action='store_true',
+                        help="Write the results to the baseline instead of comparing.")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.save:
+        parser.error(f"no baseline at {args.baseline}; record one with --save first")
+
+    failures = []
+    for scale in args.scale or ['1k']:
+        rows = SCALES[scale]
+        results = {}
+        # Every client shares one IP; the suite measures the views, not the limiter.
+        with harness.test_database(), override_settings(QUIZ_RATE_LIMITS={}):
+            caches['sessions'].clear()
+            seed(rows)
+            for name, spec in flows(rows).items():
+                if args.flow and name not in args.flow:
+                    continue
+                results[name] = run_flow(rows, *spec, args.requests, args.concurrency)
+        report(scale, results)
+        if args.save:
+            baseline[scale] = {**baseline.get(scale, {}), **results}
+        else:
+            failures.extend(f"[{scale}] {msg}" for msg in
+                            regressions(results, baseline.get(scale, {}), args.threshold))
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+    elif failures:
+        print("Regressions:", *failures, sep='\n  ')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
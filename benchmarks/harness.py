@@ -0,0 +1,122 @@
+"""
+Shared bootstrap for the Django-level benchmarks in this directory.
+
+``setup()`` configures Django from ``myapp.settings`` (or a module named in
+DJANGO_SETTINGS_MODULE) and ``test_database()`` runs the body against a fresh,
+migrated test database so ``db.sqlite3`` is never touched. On SQLite the test
+database is a temporary file rather than shared-cache memory, so concurrent
+benchmarks see the real locking behaviour and the configured pragmas.
+``measure()`` times a single-threaded loop; ``run_load()`` drives a flow from
+several threads and keeps every latency for percentiles.
+"""
+import os
+import re
+import sys
+import threading
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+LoadResult = namedtuple('LoadResult', ['latencies', 'queries'])
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup():
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myapp.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    from django.db import connection
+    from django.template import Template
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    # Keep the real template renderer: the test instrumentation copies every
+    # context to each listening client, which is quadratic under concurrency.
+    render = Template._render
+    setup_test_environment()
+    Template._render = render
+    old_name = connection.settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+
+def measure(fn, requests):
+    """Call ``fn`` ``requests`` times; return (requests/s, DB queries per call)."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        for _ in range(requests):
+            fn()
+        elapsed = time.perf_counter() - started
+    return requests / elapsed, len(ctx.captured_queries) / requests
+
+
+def run_load(clients, request, requests, prepare=None):
+    """
+    Issue ``requests`` calls of ``request(client, *args)`` from one thread per
+    client. ``prepare(client, i)``, if given, runs untimed before call ``i``
+    and returns its args. Returns the sorted per-call latencies and the DB
+    queries issued by the timed calls.
+    """
+    from django.db import connection
+
+    from quizapp.metrics import QueryRecorder
+
+    latencies = []
+    queries = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(index, client):
+        recorder = QueryRecorder()
+        local = []
+        try:
+            for i in range(index, requests, len(clients)):
+                args = prepare(client, i) if prepare else ()
+                with connection.execute_wrapper(recorder):
+                    started = time.perf_counter()
+                    request(client, *args)
+                    local.append(time.perf_counter() - started)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local)
+            queries.append(recorder.count)
+
+    threads = [threading.Thread(target=worker, args=item) for item in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return LoadResult(sorted(latencies), sum(queries))
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted sequence."""
+    return ordered[max(int(round(fraction * len(ordered))) - 1, 0)]
+
+
+def quiz_answers(response):
+    """Answer 'A' to every question on a rendered quiz page."""
+    ids = set(re.findall(rb'name="question_(\d+)"', response.content))
+    return {f'question_{pk.decode()}': 'A' for pk in ids}
@@ -0,0 +1,66 @@
+"""
+Authenticated page hits under each session profile.
+
+Logs a player in and replays the hot authenticated pages (player home, quiz
+GET, leaderboard) through the Django test client, reporting requests per
+second and DB queries per request for every QUIZ_SESSION_PROFILE engine:
+
+    python benchmarks/session_load.py --requests 500
+"""
+import argparse
+import itertools
+
+import harness
+
+harness.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from quizapp.models import Question  # noqa: E402
+from quizapp.question_bank import bump_version  # noqa: E402
+
+PAGES = ['quizapp:player_common', 'quizapp:quiz_page', 'quizapp:leaderboard']
+
+
+def run(profile, requests):
+    # The 'db' row reproduces the old setup: DB sessions with the default
+    # (session-backed fallback) message storage.
+    message_storage = settings.MESSAGE_STORAGE
+    if profile == 'db':
+        message_storage = 'django.contrib.messages.storage.fallback.FallbackStorage'
+    with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[profile],
+                           MESSAGE_STORAGE=message_storage):
+        caches['sessions'].clear()
+        client = Client()
+        client.post(reverse('quizapp:player_login'), {'username': 'bench', 'password': 'bench-pass'})
+        urls = itertools.cycle([reverse(name) for name in PAGES])
+
+        def hit():
+            response = client.get(next(urls))
+            assert response.status_code == 200, response.status_code
+
+        rps, queries = harness.measure(hit, requests)
+    print(f"{profile:>15}: {rps:8.0f} req/s  {queries:5.2f} queries/req")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    with harness.test_database():
+        User.objects.create_user('bench', password='bench-pass')
+        Question.objects.bulk_create(
+            Question(text=f'Q{i}', option_a='a', option_b='b', correct='A') for i in range(50)
+        )
+        bump_version()
+        for profile in ('db', 'cached_db', 'signed_cookies'):
+            run(profile, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Concurrent quiz-submission writes against SQLite, default vs. tuned pragmas.
+
+Each writer thread opens its own connection (like a worker process would) and
+repeatedly stores one attempt plus its answers in a transaction, while reader
+threads keep running the quiz's SELECTs. Run from the project root:
+
+    python benchmarks/sqlite_write_concurrency.py --writers 8 --readers 8
+
+The "default" profile is Python's sqlite3 defaults (rollback journal, 5s
+lock timeout), i.e. what plain ``db.sqlite3`` gives; "tuned" applies
+``QUIZ_SQLITE_PRAGMAS``.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myapp.settings')
+
+from django.conf import settings  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE attempt (id INTEGER PRIMARY KEY, player_id INTEGER, score INTEGER, total INTEGER);
+CREATE TABLE answer (id INTEGER PRIMARY KEY, attempt_id INTEGER, question_id INTEGER, selected TEXT);
+CREATE TABLE question (id INTEGER PRIMARY KEY, text TEXT, correct TEXT);
+"""
+
+
+def connect(path, pragmas, timeout):
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+
+def run(profile, pragmas, timeout, writers, readers, duration):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        setup = connect(path, pragmas, timeout)
+        setup.executescript(SCHEMA)
+        setup.executemany('INSERT INTO question (text, correct) VALUES (?, ?)',
+                          [(f'Q{i}', 'A') for i in range(1000)])
+        setup.close()
+
+        stop = time.perf_counter() + duration
+        counts = {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def writer(player_id):
+            conn = connect(path, pragmas, timeout)
+            while time.perf_counter() < stop:
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                    cur = conn.execute('INSERT INTO attempt (player_id, score, total) VALUES (?, 3, 5)',
+                                       (player_id,))
+                    conn.executemany(
+                        'INSERT INTO answer (attempt_id, question_id, selected) VALUES (?, ?, ?)',
+                        [(cur.lastrowid, q, 'A') for q in range(5)],
+                    )
+                    conn.execute('COMMIT')
+                    key = 'writes'
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    key = 'locked'
+                with lock:
+                    counts[key] += 1
+            conn.close()
+
+        def reader():
+            conn = connect(path, pragmas, timeout)
+            while time.perf_counter() < stop:
+                try:
+                    conn.execute('SELECT id, text, correct FROM question ORDER BY id LIMIT 5').fetchall()
+                    conn.execute('SELECT COUNT(*) FROM attempt').fetchone()
+                    key = 'reads'
+                except sqlite3.OperationalError:
+                    key = 'locked'
+                with lock:
+                    counts[key] += 1
+            conn.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    print(f"{profile:>8}: {counts['writes'] / duration:8.0f} writes/s  "
+          f"{counts['reads'] / duration:8.0f} reads/s  {counts['locked']:6d} locked errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    run('default', {}, 5.0, args.writers, args.readers, args.duration)
+    run('tuned', settings.QUIZ_SQLITE_PRAGMAS, 20, args.writers, args.readers, args.duration)
+
+
+if __name__ == '__main__':
+    main()
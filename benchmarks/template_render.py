@@ -0,0 +1,84 @@
+"""
+Quiz page render time by template loader and fragment cache state.
+
+Renders ``quiz_page.html`` the way ``QuizPageView`` does (template lookup plus
+render with a request context) for a fixed set of questions:
+
+    python benchmarks/template_render.py --renders 2000
+
+"uncached" is the loader setup Django used under DEBUG before 4.1 (every
+lookup re-reads and recompiles the template), "cached" the
+QUIZ_TEMPLATE_PROFILE=prod loader. "cold" renders each time under a new bank
+version, so every question fragment misses; "warm" is the steady state in
+which only the per-request parts are rendered.
+"""
+import argparse
+import copy
+import time
+
+import harness
+
+harness.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.contrib.messages.storage.cookie import CookieStorage  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.template.backends.django import DjangoTemplates  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from quizapp.question_bank import QuizQuestion  # noqa: E402
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def backend(cached):
+    params = copy.deepcopy(settings.TEMPLATES[0])
+    params.pop('BACKEND')
+    params['NAME'] = 'cached' if cached else 'uncached'
+    params['APP_DIRS'] = False
+    params['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', LOADERS)] if cached else LOADERS
+    return DjangoTemplates(params)
+
+
+def make_request():
+    request = RequestFactory().get('/quiz/quiz/')
+    request.user = AnonymousUser()
+    request._messages = CookieStorage(request)
+    return request
+
+
+def run(label, engine, renders, cold, questions):
+    request = make_request()
+    context = {'questions': questions, 'remaining': 600, 'bank_version': 0, 'fragment_timeout': 3600}
+    engine.get_template('quizapp/quiz_page.html').render(context, request)
+    started = time.perf_counter()
+    for i in range(renders):
+        if cold:
+            context['bank_version'] = i + 1
+        engine.get_template('quizapp/quiz_page.html').render(context, request)
+    per_render = (time.perf_counter() - started) / renders
+    print(f"{label:>24}: {per_render * 1e6:8.0f} us/render")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--renders', type=int, default=2000)
+    parser.add_argument('--questions', type=int, default=settings.QUIZ_QUESTION_COUNT)
+    args = parser.parse_args()
+
+    questions = [
+        QuizQuestion(i, f'Question {i}: which option is right?', ('alpha', 'beta', 'gamma', 'delta'), 'A')
+        for i in range(args.questions)
+    ]
+    caches['default'].clear()
+    run('uncached loader, cold', backend(False), args.renders, True, questions)
+    run('cached loader, cold', backend(True), args.renders, True, questions)
+    run('cached loader, warm', backend(True), args.renders, False, questions)
+
+
+if __name__ == '__main__':
+    main()
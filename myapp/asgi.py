@@ -2,6 +2,14 @@
 ASGI config for myapp project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with uvicorn, e.g.:
+
+    uvicorn myapp.asgi:application --workers 4 --host 0.0.0.0 --port 8000
+
+The player pages and the quiz are served by the sync views here too. Export
+QUIZ_ASYNC_VIEWS=1 to try the native async views in ``quizapp.async_views``;
+they are opt-in because ``benchmarks/async_submissions.py`` still measures
+them slower than the sync views under load.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,20 +13,36 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+# Deployment profile, selected with QUIZ_PROFILE:
+#   'dev'    - DEBUG on, the full admin/messages/static stack (default)
+#   'prod'   - web processes: DEBUG off, cached templates, hashed static files,
+#              no Django admin site, imports warmed in myapp.wsgi before forking
+#   'worker' - `manage.py run_workers`: DEBUG off, only the apps the jobs touch
+#              and no middleware
+# DEBUG keeps a log of every SQL query on each connection, so it is never on
+# in long-running processes.
+QUIZ_PROFILE = os.environ.get('QUIZ_PROFILE', 'dev')
+
+if QUIZ_PROFILE not in ('dev', 'prod', 'worker'):
+    raise ImproperlyConfigured(f"Unknown QUIZ_PROFILE {QUIZ_PROFILE!r}")
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-8z_o&8ua=tqedi-yu=$&$-^jssq%7$uya3orfs(bose-3x(u+('
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', 'django-insecure-8z_o&8ua=tqedi-yu=$&$-^jssq%7$uya3orfs(bose-3x(u+('
+)
+if QUIZ_PROFILE == 'prod' and 'DJANGO_SECRET_KEY' not in os.environ:
+    raise ImproperlyConfigured("QUIZ_PROFILE=prod requires DJANGO_SECRET_KEY")
 
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = QUIZ_PROFILE == 'dev'
 
-ALLOWED_HOSTS = []
+# Comma-separated; needed once DEBUG is off.
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -42,15 +58,29 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'quizapp.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'quizapp.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if QUIZ_PROFILE == 'prod':
+    # Questions are managed through quizapp's own admin pages.
+    INSTALLED_APPS.remove('django.contrib.admin')
+elif QUIZ_PROFILE == 'worker':
+    # Jobs only use the ORM and the cache.
+    INSTALLED_APPS = ['django.contrib.auth', 'django.contrib.contenttypes', 'quizapp']
+    MIDDLEWARE = []
+
+# Warm URLconf, views and templates at import time in myapp.wsgi, so a
+# preforking server (gunicorn --preload) shares them between its workers.
+QUIZ_PRELOAD = os.environ.get('QUIZ_PRELOAD', '1' if QUIZ_PROFILE == 'prod' else '0') == '1'
+
 ROOT_URLCONF = 'myapp.urls'
 
 TEMPLATES = [
@@ -69,17 +99,70 @@ TEMPLATES = [
     },
 ]
 
+# QUIZ_TEMPLATE_PROFILE=prod pins the cached loader explicitly (each template
+# is compiled once per process) and drops the debug context processor. The
+# 'dev' profile keeps APP_DIRS; Django also caches it, but the autoreloader
+# clears it whenever a template changes. Defaults to QUIZ_PROFILE.
+QUIZ_TEMPLATE_PROFILE = os.environ.get('QUIZ_TEMPLATE_PROFILE', 'dev' if QUIZ_PROFILE == 'dev' else 'prod')
+
+if QUIZ_TEMPLATE_PROFILE == 'prod':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove('django.template.context_processors.debug')
+elif QUIZ_TEMPLATE_PROFILE != 'dev':
+    raise ImproperlyConfigured(f"Unknown QUIZ_TEMPLATE_PROFILE {QUIZ_TEMPLATE_PROFILE!r}")
+
 WSGI_APPLICATION = 'myapp.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# QUIZ_DB_PROFILE selects the backend: 'sqlite' (default) or 'postgres'.
+
+QUIZ_DB_PROFILE = os.environ.get('QUIZ_DB_PROFILE', 'sqlite')
+
+if QUIZ_DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'quizapp'),
+            'USER': os.environ.get('POSTGRES_USER', 'quizapp'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Keep connections open between requests and ping them before reuse.
+            'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+elif QUIZ_DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Seconds a connection waits for another writer's lock before
+                # failing with "database is locked" (SQLite's busy timeout).
+                'timeout': 20,
+            },
+        }
     }
+else:
+    raise ImproperlyConfigured(f"Unknown QUIZ_DB_PROFILE {QUIZ_DB_PROFILE!r}")
+
+# Applied to every new SQLite connection by quizapp.db.configure_sqlite.
+# WAL lets readers run alongside the single writer. How long writers wait for
+# the lock is OPTIONS['timeout'] above; a busy_timeout pragma would override it.
+QUIZ_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
 }
 
 
@@ -119,8 +202,149 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static/')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# QUIZ_STATIC_PROFILE=prod makes collectstatic write content-hashed names and
+# precompressed variants to STATIC_ROOT; myapp.wsgi serves them with far-future
+# cache headers (see quizapp.staticfiles). Run collectstatic before starting.
+# Defaults to 'prod' under QUIZ_PROFILE=prod.
+QUIZ_STATIC_PROFILE = os.environ.get('QUIZ_STATIC_PROFILE', 'prod' if QUIZ_PROFILE == 'prod' else 'dev')
+
+if QUIZ_STATIC_PROFILE == 'prod':
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'quizapp.staticfiles.CompressedManifestStaticFilesStorage'},
+    }
+elif QUIZ_STATIC_PROFILE != 'dev':
+    raise ImproperlyConfigured(f"Unknown QUIZ_STATIC_PROFILE {QUIZ_STATIC_PROFILE!r}")
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Set QUIZ_REDIS_URL to share the question snapshot and its version counter
+# between worker processes; the local-memory default is per process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+}
+if os.environ.get('QUIZ_REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['QUIZ_REDIS_URL'],
+    }
+# QUIZ_SESSION_CACHE picks the cache behind cached_db sessions:
+#   'locmem' - per-process memory; only safe with a single process (dev default)
+#   'file'   - a cache directory shared by every process on the host
+#              (prod default without QUIZ_REDIS_URL)
+#   'redis'  - the QUIZ_REDIS_URL server (prod default when it is set)
+QUIZ_SESSION_CACHE = os.environ.get(
+    'QUIZ_SESSION_CACHE',
+    'locmem' if QUIZ_PROFILE != 'prod' else 'redis' if os.environ.get('QUIZ_REDIS_URL') else 'file',
+)
+if QUIZ_SESSION_CACHE == 'file':
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'sessions',
+    }
+elif QUIZ_SESSION_CACHE == 'redis':
+    if not os.environ.get('QUIZ_REDIS_URL'):
+        raise ImproperlyConfigured("QUIZ_SESSION_CACHE=redis requires QUIZ_REDIS_URL")
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['QUIZ_REDIS_URL'],
+        'KEY_PREFIX': 'sessions',
+    }
+elif QUIZ_SESSION_CACHE != 'locmem':
+    raise ImproperlyConfigured(f"Unknown QUIZ_SESSION_CACHE {QUIZ_SESSION_CACHE!r}")
+
+
+# Sessions and messages
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/
+# QUIZ_SESSION_PROFILE selects the session engine:
+#   'db'             - one django_session read per request, a write per change
+#   'cached_db'      - reads served from the 'sessions' cache, writes go through to the DB
+#   'signed_cookies' - no server-side storage at all
+# Messages always use cookie storage so messages.* never touches the session.
+
+QUIZ_SESSION_PROFILE = os.environ.get('QUIZ_SESSION_PROFILE', 'cached_db')
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if QUIZ_SESSION_PROFILE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f"Unknown QUIZ_SESSION_PROFILE {QUIZ_SESSION_PROFILE!r}")
+SESSION_ENGINE = SESSION_ENGINES[QUIZ_SESSION_PROFILE]
+if QUIZ_PROFILE == 'prod' and QUIZ_SESSION_PROFILE == 'cached_db' and QUIZ_SESSION_CACHE == 'locmem':
+    # Each worker would keep serving its own copy of a session after another
+    # worker changed it.
+    raise ImproperlyConfigured("QUIZ_PROFILE=prod cannot keep cached_db sessions in a local-memory cache")
+SESSION_CACHE_ALIAS = 'sessions'
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# Quiz
+
+QUIZ_QUESTION_COUNT = 5
+# Serve the player pages and quiz with quizapp.async_views (opt-in, ASGI only).
+QUIZ_ASYNC_VIEWS = os.environ.get('QUIZ_ASYNC_VIEWS') == '1'
+QUIZ_CACHE_ALIAS = 'default'
+QUIZ_SNAPSHOT_TIMEOUT = 3600
+
+# Seconds a role claim stays trusted when QUIZ_CACHE_ALIAS is per process and
+# role changes made in another process cannot reach it (see quizapp.roles).
+QUIZ_ROLES_TIMEOUT = 300
+
+# Read-only pages carry ETags and revalidate with 304s (quizapp.http_cache).
+# Set QUIZ_RELEASE per deploy so pages rendered by older templates are
+# not reused; the anonymous homepage is cached for QUIZ_PAGE_CACHE_TIMEOUT.
+QUIZ_RELEASE = os.environ.get('QUIZ_RELEASE', '')
+QUIZ_PAGE_CACHE_TIMEOUT = 300
+
+# Seconds allowed per quiz (0 = untimed) and slack for the final submit.
+QUIZ_TIME_LIMIT = 600
+QUIZ_DEADLINE_GRACE = 5
+
+# Number of players kept in the cached leaderboard (see quizapp.leaderboard)
+# and seconds before it is reloaded, so updates made by job workers show up
+# even when the cache is per process.
+QUIZ_LEADERBOARD_SIZE = 100
+QUIZ_LEADERBOARD_TIMEOUT = 60
+
+# Per-view metrics (quizapp.metrics): warn when a request runs more queries
+# than the threshold or repeats one statement (N+1). /metrics/ is open to
+# staff, or to scrapers sending this bearer token when it is set.
+QUIZ_METRICS_QUERY_THRESHOLD = 20
+QUIZ_METRICS_REPEAT_THRESHOLD = 5
+QUIZ_METRICS_TOKEN = os.environ.get('QUIZ_METRICS_TOKEN', '')
+
+# Sliding-window POST limits per view scope (see quizapp.ratelimit), as
+# (identity, max requests, window seconds); identity is 'ip', 'username'
+# (from the form) or 'user' (the logged-in user id).
+QUIZ_RATE_LIMITS = {
+    'login': [('ip', 30, 60), ('username', 5, 60)],
+    'register': [('ip', 10, 600)],
+    'quiz_submit': [('user', 10, 60)],
+}
+
+# Background jobs (quizapp.jobs, run by `manage.py run_workers`). With
+# QUIZ_JOBS_EAGER=1 tasks run inline in the request instead of being queued.
+QUIZ_JOBS_EAGER = os.environ.get('QUIZ_JOBS_EAGER') == '1'
+QUIZ_JOB_WORKERS = 2
+QUIZ_JOB_MAX_ATTEMPTS = 5
+QUIZ_JOB_RETRY_DELAY = 5
+QUIZ_JOB_TIMEOUT = 300
+QUIZ_JOB_RETENTION = 86400
@@ -2,6 +2,12 @@
 WSGI config for myapp project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Requests under STATIC_URL are answered from STATIC_ROOT by
+``quizapp.staticfiles.StaticFilesApp`` before they reach Django. With
+``QUIZ_PRELOAD`` (on in the prod profile) URLs, views and templates are warmed
+at import, so serve it with a preforking server that imports the app once:
+
+    QUIZ_PROFILE=prod gunicorn myapp.wsgi --preload --workers 4
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
@@ -14,3 +20,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myapp.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+from quizapp.staticfiles import StaticFilesApp  # noqa: E402 - needs the app registry
+
+application = StaticFilesApp(application)
+
+if settings.QUIZ_PRELOAD:
+    from quizapp.preload import preload
+
+    preload()
@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import QuestionBank
+
+
+# Only installed in the dev profile; prod admins use quizapp:add_question_bank.
+@admin.register(QuestionBank)
+class QuestionBankAdmin(admin.ModelAdmin):
+    list_display = ('name', 'description', 'created_at')
+    search_fields = ('name',)
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class QuizappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quizapp'
+
+    def ready(self):
+        from . import tasks  # noqa: F401 - registers the job handlers
+        from .db import configure_sqlite
+        from .metrics import install_query_recorder
+
+        connection_created.connect(configure_sqlite, dispatch_uid='quizapp.configure_sqlite')
+        connection_created.connect(install_query_recorder, dispatch_uid='quizapp.install_query_recorder')
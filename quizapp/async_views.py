@@ -0,0 +1,168 @@
+"""
+Native async versions of the player pages and the quiz.
+
+Used instead of the views in ``quizapp.views`` when ``QUIZ_ASYNC_VIEWS`` is
+on; it is off by default, under ``myapp.asgi`` too. Auth, roles and question loading use
+the async ORM, and a graded submission is handed to the job queue with one
+async INSERT (``quizapp.tasks``). Session reads stay on the loop with cache
+or signed-cookie sessions; a DB session miss falls back to one thread hop.
+"""
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.exceptions import SynchronousOnlyOperation
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from django.views.generic import View
+
+from .grading import grade_submission, read_answers
+from .models import Player
+from .question_bank import aget_questions, asample_question_ids, fragment_context
+from .quiz_sessions import (
+    aget_active_session, astart_session, finish_session, is_expired, is_open, remaining_seconds
+)
+from .ratelimit import check as check_rate_limit, too_many_requests
+from .roles import aget_request_roles
+from .tasks import asubmit
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+async def _aload_session(session):
+    try:
+        session.keys()
+    except SynchronousOnlyOperation:
+        await sync_to_async(session.keys)()
+
+
+async def aget_user(request):
+    """Async ``django.contrib.auth.get_user`` for the default ModelBackend."""
+    if hasattr(request, '_cached_user'):
+        return request._cached_user
+
+    await _aload_session(request.session)
+    if request.session.get(BACKEND_SESSION_KEY) not in (None, MODEL_BACKEND):
+        user = await sync_to_async(get_user)(request)
+    else:
+        user = AnonymousUser()
+        if SESSION_KEY in request.session:
+            user_id = User._meta.pk.to_python(request.session[SESSION_KEY])
+            candidate = await User.objects.filter(pk=user_id, is_active=True).afirst()
+            session_hash = request.session.get(HASH_SESSION_KEY)
+            if candidate is not None and session_hash and constant_time_compare(
+                session_hash, candidate.get_session_auth_hash()
+            ):
+                user = candidate
+            elif candidate is not None:
+                await sync_to_async(request.session.flush)()
+
+    request._cached_user = user
+    return user
+
+
+class AsyncRateLimitMixin:
+    """Async counterpart of ``RateLimitMixin``."""
+    rate_limit_scope = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            await _aload_session(request.session)
+            retry_after = check_rate_limit(self.rate_limit_scope, request)
+            if retry_after:
+                return too_many_requests(retry_after)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncPlayerRequiredMixin:
+    """Async counterpart of ``PlayerRequiredMixin``."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await aget_user(request)
+        if not (user.is_authenticated and (await aget_request_roles(request, user)).is_player):
+            messages.error(request, "Only players can access this page.")
+            return redirect('quizapp:homepage')
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class PlayerCommonView(AsyncPlayerRequiredMixin, View):
+    async def get(self, request):
+        return render(request, 'quizapp/player_common.html')
+
+
+class QuizPageView(AsyncRateLimitMixin, AsyncPlayerRequiredMixin, View):
+    rate_limit_scope = 'quiz_submit'
+
+    async def get(self, request):
+        question_ids = await asample_question_ids()
+        players = Player.objects.filter(user_id=request._cached_user.pk).values_list('id', flat=True)
+        player_id = await players.aget()
+        quiz_session = await astart_session(request._cached_user, player_id, question_ids)
+        request.session['quiz_session_id'] = quiz_session.id
+        questions = await aget_questions(question_ids)
+        return render(request, 'quizapp/quiz_page.html', {
+            'questions': questions,
+            'quiz_session': quiz_session,
+            'remaining': remaining_seconds(quiz_session),
+            **fragment_context(),
+            'stream_url': reverse('quizapp:quiz_countdown', args=[quiz_session.id]),
+        })
+
+    async def post(self, request):
+        session_id = request.session.pop('quiz_session_id', None)
+        quiz_session = await aget_active_session(session_id) if session_id else None
+        if quiz_session is None:
+            messages.error(request, "Please start the quiz before submitting.")
+            return redirect('quizapp:quiz_page')
+        if is_expired(quiz_session):
+            await sync_to_async(finish_session)(quiz_session)
+            messages.error(request, "Time is up; this quiz can no longer be submitted.")
+            return redirect('quizapp:player_common')
+
+        questions = await aget_questions(quiz_session.question_ids)
+        answers = read_answers(request.POST, questions)
+        result = grade_submission(questions, answers)
+        context = dict(result, not_attempted=result['total'] - result['attempted'])
+        await asubmit(quiz_session, questions, answers, result)
+        return render(request, 'quizapp/quiz_result.html', context)
+
+
+async def _countdown_events(quiz_session):
+    yield 'retry: 3000\n\n'
+    while True:
+        remaining = remaining_seconds(quiz_session)
+        if remaining is None:
+            yield 'event: untimed\ndata: null\n\n'
+            return
+        yield f'data: {math.ceil(remaining)}\n\n'
+        if remaining <= 0:
+            yield 'event: expired\ndata: 0\n\n'
+            return
+        await asyncio.sleep(min(1, remaining))
+        if not is_open(quiz_session):
+            yield 'event: closed\ndata: null\n\n'
+            return
+
+
+async def quiz_countdown(request, session_id):
+    """
+    Server-Sent Events stream of the seconds left in a quiz session.
+
+    Every open stream is a coroutine sleeping on the event loop, so thousands
+    of clients cost no threads. Requires ASGI; under WSGI the quiz page falls
+    back to a client-side countdown and never opens this stream.
+    """
+    user = await aget_user(request)
+    quiz_session = await aget_active_session(session_id)
+    if not user.is_authenticated or quiz_session is None or quiz_session.user_id != user.pk:
+        raise Http404("No active quiz session.")
+
+    response = StreamingHttpResponse(_countdown_events(quiz_session), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,48 @@
+"""
+Persistence of graded quiz submissions.
+
+``record_attempt`` stores one ``QuizAttempt`` plus all of its answers in a
+single transaction (one INSERT for the attempt, one ``bulk_create`` for the
+answers). It is called by the ``record_submission`` job (``quizapp.tasks``),
+so the write is already off the request path and a job only finishes once
+its attempt is stored.
+"""
+from django.db import transaction
+
+from .models import AttemptAnswer, QuizAttempt
+
+
+def _build(player, questions, answers, result):
+    attempt = QuizAttempt(
+        player=player,
+        score=result['score'],
+        attempted=result['attempted'],
+        total=result['total'],
+        percentage=result['percentage'],
+    )
+    rows = [
+        AttemptAnswer(
+            question_id=q.id,
+            selected=answers.get(q.id) or '',
+            is_correct=answers.get(q.id) == q.correct,
+        )
+        for q in questions
+    ]
+    return attempt, rows
+
+
+def record_attempt(player, questions, answers, result):
+    """
+    Store a graded submission.
+
+    ``answers`` maps question id to the submitted option letter and ``result``
+    holds the score, attempted, total and percentage computed by the view.
+    Returns the saved attempt.
+    """
+    attempt, rows = _build(player, questions, answers, result)
+    with transaction.atomic():
+        attempt.save()
+        for row in rows:
+            row.attempt = attempt
+        AttemptAnswer.objects.bulk_create(rows)
+    return attempt
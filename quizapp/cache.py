@@ -0,0 +1,22 @@
+"""
+The cache quizapp keeps its shared state in.
+
+Question bank versions, leaderboards, quiz sessions, rate-limit counters and
+cached pages all live in the ``QUIZ_CACHE_ALIAS`` cache. With a process-local
+backend (the local-memory default) every process has its own copy, which is
+only safe when a single process serves the site; ``is_shared`` tells the
+callers that need other processes to see their writes.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def quiz_cache():
+    return caches[getattr(settings, 'QUIZ_CACHE_ALIAS', 'default')]
+
+
+def is_shared():
+    """Whether writes to ``quiz_cache()`` are visible to other processes."""
+    return not isinstance(quiz_cache(), (LocMemCache, DummyCache))
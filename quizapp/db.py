@@ -0,0 +1,17 @@
+"""
+Database connection tuning.
+
+``configure_sqlite`` is connected to ``connection_created`` in
+``QuizappConfig.ready`` and applies ``QUIZ_SQLITE_PRAGMAS`` to every new
+SQLite connection. Other backends are left untouched.
+"""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'QUIZ_SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
-from .models import Player, Question
+from django.db import transaction
+from .models import Player, Question, QuestionBank
 
 class PlayerRegistrationForm(forms.ModelForm):
     # ModelForm for Player and related User fields
@@ -20,47 +21,82 @@ class PlayerRegistrationForm(forms.ModelForm):
         return username
 
     def save(self, commit=True):
-        user = User.objects.create_user(
+        """
+        Create the User and its Player in one transaction. With
+        ``commit=False`` both are returned unsaved, as ``player.user`` and the
+        player: save the user first, then the player.
+        """
+        user = User(
             username=self.cleaned_data['username'],
-            email=self.cleaned_data['email'],
-            password=self.cleaned_data['password']
+            email=User.objects.normalize_email(self.cleaned_data['email']),
         )
+        user.set_password(self.cleaned_data['password'])
         player = super().save(commit=False)
-        player.user = user
-        player.display_name = self.cleaned_data.get('display_name') or user.username
+        player.display_name = player.display_name or user.username
+        # Caches the profile on the user, so create_profiles leaves it to us.
+        user.player_profile = player
         if commit:
-            player.save()
+            with transaction.atomic():
+                user.save()
+                player.user = user
+                player.save()
         return player
 
 
-
 class QuestionForm(forms.ModelForm):
+    # Options are edited as four inputs and stored as Question.options.
+    option_a = forms.CharField(max_length=200, widget=forms.TextInput(attrs={'placeholder': 'Option A'}))
+    option_b = forms.CharField(max_length=200, widget=forms.TextInput(attrs={'placeholder': 'Option B'}))
+    option_c = forms.CharField(max_length=200, required=False,
+                               widget=forms.TextInput(attrs={'placeholder': 'Option C (optional)'}))
+    option_d = forms.CharField(max_length=200, required=False,
+                               widget=forms.TextInput(attrs={'placeholder': 'Option D (optional)'}))
+
+    OPTION_FIELDS = ['option_a', 'option_b', 'option_c', 'option_d']
+
     class Meta:
         model = Question
-        fields = ['text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct']
+        fields = ['text', 'correct', 'bank', 'category', 'difficulty']
         widgets = {
             'text': forms.Textarea(attrs={'rows': 3, 'placeholder': 'Enter your question here'}),
-            'option_a': forms.TextInput(attrs={'placeholder': 'Option A'}),
-            'option_b': forms.TextInput(attrs={'placeholder': 'Option B'}),
-            'option_c': forms.TextInput(attrs={'placeholder': 'Option C (optional)'}),
-            'option_d': forms.TextInput(attrs={'placeholder': 'Option D (optional)'}),
             'correct': forms.Select(attrs={'class': 'form-select'}),
         }
 
+    field_order = ['text', *OPTION_FIELDS, 'correct', 'bank', 'category', 'difficulty']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.OPTION_FIELDS:
+            self.initial.setdefault(name, getattr(self.instance, name))
+        self.fields['difficulty'].required = False
+
+    def clean_difficulty(self):
+        return self.cleaned_data.get('difficulty') or Question.MEDIUM
+
+    def clean(self):
+        cleaned_data = super().clean()
+        correct = cleaned_data.get('correct')
 
-        def clean(self):
-            cleaned_data = super().clean()
-            correct = cleaned_data.get('correct')
-            
-            if correct:
-                option_field = f'option_{correct.lower()}'
-                option_value = cleaned_data.get(option_field)
-                
-                if not option_value or not option_value.strip():
-                    raise forms.ValidationError(
-                        f"The correct answer is set to '{correct}', but that option is empty. "
-                        f"Please provide text for option {correct} or select a different correct answer."
-                    )
-            
-            return cleaned_data
+        if correct:
+            option_field = f'option_{correct.lower()}'
+            option_value = cleaned_data.get(option_field)
 
+            if not option_value or not option_value.strip():
+                raise forms.ValidationError(
+                    f"The correct answer is set to '{correct}', but that option is empty. "
+                    f"Please provide text for option {correct} or select a different correct answer."
+                )
+
+        return cleaned_data
+
+    def _post_clean(self):
+        for name in self.OPTION_FIELDS:
+            if name in self.cleaned_data:
+                setattr(self.instance, name, self.cleaned_data[name])
+        super()._post_clean()
+
+
+class QuestionBankForm(forms.ModelForm):
+    class Meta:
+        model = QuestionBank
+        fields = ['name', 'description']
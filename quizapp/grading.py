@@ -0,0 +1,108 @@
+"""
+Batch grading engine.
+
+Answer keys and submissions are encoded as small integer option codes
+(0 = not answered, 1-4 = A-D) so a whole batch can be scored with a handful
+of NumPy array operations. ``QuizPageView`` grades single submissions through
+the same functions, and ``manage.py regrade_attempts`` uses ``grade_answers``
+to rescore every stored attempt after an answer key fix.
+
+NumPy is optional; without it the same functions fall back to plain Python.
+"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+OPTIONS = 'ABCD'
+OPTION_CODES = {letter: code for code, letter in enumerate(OPTIONS, start=1)}
+
+
+def encode(letter):
+    """Option code for a submitted or correct letter; 0 for blank/unknown."""
+    return OPTION_CODES.get(letter or '', 0)
+
+
+def decode(code):
+    return OPTIONS[code - 1] if code else ''
+
+
+def read_answers(data, questions):
+    """
+    Chosen letters from the ``question_<id>`` fields of ``data`` (a POST),
+    keyed by question id. Anything other than A-D counts as not attempted.
+    """
+    answers = {}
+    for q in questions:
+        letter = decode(encode(data.get(f'question_{q.id}')))
+        if letter:
+            answers[q.id] = letter
+    return answers
+
+
+def score_percentage(score, total):
+    return round(score / total * 100, 2) if total > 0 else 0
+
+
+def grade_batch(key, submissions):
+    """
+    Score submissions that all answered the same questions.
+
+    ``key`` is a sequence of Q option codes and ``submissions`` an N x Q
+    sequence of submitted codes. Returns a list of
+    ``{'score', 'attempted', 'total', 'percentage'}`` dicts, one per row.
+    """
+    total = len(key)
+    if np is not None:
+        key = np.asarray(key, dtype=np.uint8)
+        subs = np.asarray(submissions, dtype=np.uint8).reshape(len(submissions), total)
+        answered = subs != 0
+        attempted = answered.sum(axis=1)
+        scores = (answered & (subs == key)).sum(axis=1).tolist()
+        percentages = [score_percentage(score, total) for score in scores]
+        rows = zip(scores, attempted.tolist(), percentages)
+    else:
+        rows = []
+        for sub in submissions:
+            score = sum(1 for got, want in zip(sub, key) if got and got == want)
+            rows.append((score, sum(1 for got in sub if got), score_percentage(score, total)))
+
+    return [
+        {'score': score, 'attempted': attempted, 'total': total, 'percentage': percentage}
+        for score, attempted, percentage in rows
+    ]
+
+
+def grade_submission(questions, answers):
+    """Grade one submission; ``answers`` maps question id to the chosen letter."""
+    key = [encode(q.correct) for q in questions]
+    submitted = [encode(answers.get(q.id)) for q in questions]
+    return grade_batch(key, [submitted])[0]
+
+
+def grade_answers(groups, selected, expected, n_groups):
+    """
+    Score a flat list of stored answers belonging to ``n_groups`` attempts.
+
+    ``groups[i]`` is the attempt position (0..n_groups-1) of answer ``i``,
+    ``selected[i]`` its submitted code and ``expected[i]`` the correct code.
+    Attempts may cover different questions. Returns ``(correct, scores,
+    totals)``: a per-answer correctness list and per-attempt score and
+    question counts.
+    """
+    if np is not None:
+        groups = np.asarray(groups, dtype=np.int64)
+        selected = np.asarray(selected, dtype=np.uint8)
+        expected = np.asarray(expected, dtype=np.uint8)
+        correct = (selected != 0) & (selected == expected)
+        scores = np.bincount(groups, weights=correct, minlength=n_groups).astype(np.int64)
+        totals = np.bincount(groups, minlength=n_groups)
+        return correct.tolist(), scores.tolist(), totals.tolist()
+
+    correct = [bool(got) and got == want for got, want in zip(selected, expected)]
+    scores = [0] * n_groups
+    totals = [0] * n_groups
+    for group, ok in zip(groups, correct):
+        totals[group] += 1
+        scores[group] += ok
+    return correct, scores, totals
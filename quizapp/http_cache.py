@@ -0,0 +1,118 @@
+"""
+HTTP caching for the read-only pages.
+
+``ConditionalPageMixin`` gives a page a weak ETag and answers a GET whose
+``If-None-Match`` still matches with 304 through Django's ``condition``
+decorator, before access checks, queries or template rendering. The tag is a
+hash of what the page is rendered from:
+
+* the question bank version and ``QUIZ_RELEASE`` (templates change on deploy),
+* the logged-in user id, session auth hash, role claim and role version, read
+  from the session and cache rather than ``request.user`` so a match costs no
+  user query,
+* the CSRF secret, because the page embeds a token derived from it,
+* whatever the view adds in ``etag_parts``.
+
+A page rendered with flash messages gets no tag, so it is never replayed.
+Responses are marked ``private, no-cache``: browsers keep them but
+revalidate on every navigation, and shared caches never store them.
+
+``AnonymousPageCacheMixin`` also keeps the rendered page for visitors who are
+not logged in in the ``QUIZ_CACHE_ALIAS`` cache; use it only on pages without
+forms, as a cached CSRF token would be shared. ``invalidate_pages`` drops
+those copies; the question create, update and delete views and the importer
+call it next to ``bump_version``.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY as USER_SESSION_KEY
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cache import quiz_cache
+from .question_bank import get_version
+from .roles import SESSION_KEY as ROLES_SESSION_KEY, get_version as get_roles_version
+
+PAGE_KEY = 'quizapp:page:{name}'
+# Every page_cache_name in use; invalidate_pages must not depend on which
+# view modules the calling process happened to import.
+CACHED_PAGES = ('home',)
+
+
+def page_etag(request, *parts):
+    """Weak ETag for a page rendered for this session, or ``None`` if it must not be reused."""
+    if CookieStorage.cookie_name in request.COOKIES:
+        return None
+    session = request.session
+    user_id = session.get(USER_SESSION_KEY)
+    values = [
+        getattr(settings, 'QUIZ_RELEASE', ''), get_version(), request.path,
+        user_id, session.get(HASH_SESSION_KEY), session.get(ROLES_SESSION_KEY),
+        user_id and get_roles_version(user_id),
+        request.META.get('CSRF_COOKIE'), *parts,
+    ]
+    digest = hashlib.sha256(repr(values).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def invalidate_pages():
+    """Drop every cached anonymous page; call after any question write."""
+    quiz_cache().delete_many([PAGE_KEY.format(name=name) for name in CACHED_PAGES])
+
+
+class ConditionalPageMixin:
+    """Adds ETag revalidation to GET requests; list it first, before access-control mixins."""
+
+    def etag_parts(self, request):
+        """Extra values the page depends on, beyond the session and bank version."""
+        return ()
+
+    def _etag(self, request, *args, **kwargs):
+        parts = self.etag_parts(request)
+        return None if parts is None else page_etag(request, *parts)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        response = condition(etag_func=self._etag)(super().dispatch)(request, *args, **kwargs)
+        if response.status_code == 200:
+            # The view may have changed what the tag covers (a new quiz
+            # session, a CSRF secret issued while rendering), so tag the
+            # final state.
+            if hasattr(response, 'render'):
+                response.render()
+            etag = self._etag(request)
+            if etag is None:
+                del response['ETag']
+            else:
+                response['ETag'] = etag
+        elif response.status_code != 304:
+            del response['ETag']
+        if response.status_code in (200, 304):
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AnonymousPageCacheMixin:
+    """Serves the page to anonymous visitors from the cache until ``invalidate_pages``."""
+    page_cache_name = None  # must be listed in CACHED_PAGES
+
+    def get(self, request, *args, **kwargs):
+        anonymous = (USER_SESSION_KEY not in request.session
+                     and CookieStorage.cookie_name not in request.COOKIES)
+        if not anonymous:
+            return super().get(request, *args, **kwargs)
+        key = PAGE_KEY.format(name=self.page_cache_name)
+        cached = quiz_cache().get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.render()
+            quiz_cache().set(key, (response.content, response['Content-Type']),
+                         timeout=getattr(settings, 'QUIZ_PAGE_CACHE_TIMEOUT', 300))
+        return response
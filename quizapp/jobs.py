@@ -0,0 +1,168 @@
+"""
+Small database-backed job queue.
+
+Views call ``enqueue`` with the name of a function registered through
+``@task`` and a JSON payload; ``manage.py run_workers`` claims queued rows
+and runs them on a pool of worker processes. Passing an idempotency ``key``
+makes enqueueing the same work twice a no-op, so tasks can be queued from
+code paths that may repeat. Failures are retried with exponential backoff up
+to ``max_attempts``, then the job is left ``failed`` with its traceback in
+``last_error``. A job whose worker died mid-run is handed out again after
+``QUIZ_JOB_TIMEOUT`` seconds, so tasks must be safe to run more than once.
+
+Workers claim a batch with one conditional UPDATE tagged with a random
+token, which works the same on SQLite and PostgreSQL without row locks. With
+``QUIZ_JOBS_EAGER`` set, ``enqueue`` runs the task inline instead, for
+development without a worker and for tests.
+"""
+import logging
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register the decorated function as the handler for jobs called ``name``."""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def _eager():
+    return getattr(settings, 'QUIZ_JOBS_EAGER', False)
+
+
+def _new_job(name, payload, key, max_attempts):
+    return Job(
+        name=name, payload=payload, idempotency_key=key,
+        max_attempts=max_attempts or getattr(settings, 'QUIZ_JOB_MAX_ATTEMPTS', 5),
+    )
+
+
+def enqueue(name, payload, key=None, max_attempts=None):
+    """
+    Queue ``name(**payload)``. Returns the job, the existing one when ``key``
+    was already used, or ``None`` when the task ran eagerly.
+    """
+    if _eager():
+        TASKS[name](**payload)
+        return None
+    job = _new_job(name, payload, key, max_attempts)
+    try:
+        with transaction.atomic():
+            job.save(force_insert=True)
+    except IntegrityError:
+        if key is None:
+            raise
+        job = Job.objects.get(idempotency_key=key)
+    return job
+
+
+async def aenqueue(name, payload, key=None, max_attempts=None):
+    if _eager():
+        await sync_to_async(TASKS[name])(**payload)
+        return None
+    job = _new_job(name, payload, key, max_attempts)
+    try:
+        await job.asave(force_insert=True)
+    except IntegrityError:
+        if key is None:
+            raise
+        job = await Job.objects.aget(idempotency_key=key)
+    return job
+
+
+def claim(limit):
+    """Mark up to ``limit`` due jobs as running for this worker and return them."""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now).order_by('run_after')
+    ids = list(due.values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+        status=Job.RUNNING, locked_by=token, locked_at=now
+    )
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING))
+
+
+def run(job):
+    """Run one claimed job and record the outcome; returns True on success."""
+    job.attempts += 1
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        logger.exception("Job %s failed (attempt %d of %d)", job, job.attempts, job.max_attempts)
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts and job.name in TASKS:
+            delay = getattr(settings, 'QUIZ_JOB_RETRY_DELAY', 5) * 2 ** (job.attempts - 1)
+            job.status = Job.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+        job.last_error = ''
+    job.locked_by = ''
+    job.save(update_fields=['attempts', 'status', 'run_after', 'finished_at', 'last_error', 'locked_by'])
+    return job.status == Job.DONE
+
+
+def requeue_stale():
+    """Hand jobs whose worker disappeared back to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'QUIZ_JOB_TIMEOUT', 300))
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff).update(
+        status=Job.QUEUED, locked_by=''
+    )
+
+
+def purge_finished():
+    """Delete completed jobs older than ``QUIZ_JOB_RETENTION`` seconds."""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'QUIZ_JOB_RETENTION', 86400))
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(batch_size=10, poll_interval=1.0, once=False):
+    """
+    Process jobs until interrupted, sleeping ``poll_interval`` seconds when the
+    queue is empty. With ``once``, return the number of jobs run as soon as
+    no job is due.
+    """
+    processed = 0
+    idle = True
+    while True:
+        jobs = []
+        try:
+            if idle:
+                requeue_stale()
+                purge_finished()
+            jobs = claim(batch_size)
+            for job in jobs:
+                run(job)
+            processed += len(jobs)
+        except Exception:
+            # Keep the worker alive through database hiccups.
+            logger.exception("Job worker loop failed")
+        finally:
+            close_old_connections()
+        idle = not jobs
+        if idle:
+            if once:
+                return processed
+            time.sleep(poll_interval)
@@ -0,0 +1,131 @@
+"""
+Materialized leaderboard.
+
+Every graded submission updates the player's ``PlayerStats`` row in place and
+then the top-K list kept in the cache (``QUIZ_CACHE_ALIAS``). Reading a
+leaderboard page is a slice of that list, so page views never aggregate over
+attempts. Updating the cached list is a read-modify-write, so with several
+processes sharing a cache it is best effort; ``manage.py rebuild_leaderboard``
+recomputes both from scratch and corrects any drift.
+
+Submissions are recorded by job workers (see ``quizapp.tasks``). When the
+cache is process-local their updates never reach the web processes, so the
+list expires after ``QUIZ_LEADERBOARD_TIMEOUT`` seconds and is reloaded from
+the stats table, one indexed query.
+"""
+import bisect
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import quiz_cache
+from .models import PlayerStats, QuizAttempt
+
+TOP_KEY = 'quizapp:leaderboard:top'
+
+LeaderboardEntry = namedtuple(
+    'LeaderboardEntry', ['player_id', 'name', 'total_score', 'best_percentage', 'attempts']
+)
+
+_lock = threading.Lock()
+
+
+def _size():
+    return getattr(settings, 'QUIZ_LEADERBOARD_SIZE', 100)
+
+
+def _timeout():
+    return getattr(settings, 'QUIZ_LEADERBOARD_TIMEOUT', 60)
+
+
+def _rank_key(entry):
+    return (-entry.total_score, -entry.best_percentage, entry.player_id)
+
+
+def record_result(player, result):
+    """Fold one graded submission into the player's stats and the top-K list."""
+    now = timezone.now()
+    updated = PlayerStats.objects.filter(player=player).update(
+        attempts=F('attempts') + 1,
+        total_score=F('total_score') + result['score'],
+        total_questions=F('total_questions') + result['total'],
+        best_percentage=Greatest(F('best_percentage'), result['percentage']),
+        last_attempt_at=now,
+    )
+    if not updated:
+        stats, created = PlayerStats.objects.get_or_create(player=player, defaults={
+            'attempts': 1,
+            'total_score': result['score'],
+            'total_questions': result['total'],
+            'best_percentage': result['percentage'],
+            'last_attempt_at': now,
+        })
+        if not created:
+            return record_result(player, result)
+    else:
+        stats = PlayerStats.objects.only(
+            'total_score', 'best_percentage', 'attempts'
+        ).get(player=player)
+
+    _offer(LeaderboardEntry(
+        player.id, str(player), stats.total_score, stats.best_percentage, stats.attempts
+    ))
+
+
+def _offer(entry):
+    cache = quiz_cache()
+    with _lock:
+        top = cache.get(TOP_KEY)
+        if top is None:
+            top = _load_top()
+        top = [e for e in top if e.player_id != entry.player_id]
+        keys = [_rank_key(e) for e in top]
+        position = bisect.bisect_left(keys, _rank_key(entry))
+        if position < _size():
+            top.insert(position, entry)
+            del top[_size():]
+        cache.set(TOP_KEY, top, timeout=_timeout())
+
+
+def _load_top():
+    rows = (
+        PlayerStats.objects.select_related('player__user')
+        .order_by('-total_score', '-best_percentage', 'player_id')[:_size()]
+    )
+    return [
+        LeaderboardEntry(s.player_id, str(s.player), s.total_score, s.best_percentage, s.attempts)
+        for s in rows
+    ]
+
+
+def get_top():
+    """The top-K entries, best first; reloaded from the stats table if evicted."""
+    cache = quiz_cache()
+    top = cache.get(TOP_KEY)
+    if top is None:
+        top = _load_top()
+        cache.set(TOP_KEY, top, timeout=_timeout())
+    return top
+
+
+def rebuild():
+    """Recompute every player's stats from stored attempts and reset the top-K list."""
+    totals = QuizAttempt.objects.values('player_id').annotate(
+        attempts=Count('id'),
+        total_score=Sum('score'),
+        total_questions=Sum('total'),
+        best_percentage=Max('percentage'),
+        last_attempt_at=Max('created_at'),
+    ).order_by()
+    with transaction.atomic():
+        PlayerStats.objects.all().delete()
+        PlayerStats.objects.bulk_create(
+            (PlayerStats(**row) for row in totals.iterator()), batch_size=1000
+        )
+    quiz_cache().set(TOP_KEY, _load_top(), timeout=_timeout())
+    return PlayerStats.objects.count()
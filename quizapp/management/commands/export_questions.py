@@ -0,0 +1,56 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quizapp.forms import QuestionForm
+from quizapp.models import Question
+
+# Options are written as option_a..option_d columns so files stay importable.
+COLUMNS = ['id', 'text', 'options', 'correct', 'bank', 'category', 'difficulty']
+FIELDS = ['id', 'text', *QuestionForm.OPTION_FIELDS, 'correct', 'bank', 'category', 'difficulty']
+
+
+def flatten(row):
+    pk, text, options, *rest = row
+    return (pk, text, *(list(options) + [''] * 4)[:4], *rest)
+
+
+class Command(BaseCommand):
+    help = "Stream the question bank to a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or '-' for stdout.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Rows fetched per database round-trip (default: 2000).")
+
+    def handle(self, *args, path, format, chunk_size, **options):
+        fmt = format or path.rsplit('.', 1)[-1].lower()
+        if fmt not in ('csv', 'jsonl'):
+            raise CommandError("Cannot infer the format; pass --format csv or --format jsonl.")
+
+        rows = Question.objects.order_by('id').values_list(*COLUMNS).iterator(chunk_size=chunk_size)
+        rows = map(flatten, rows)
+        stream = self.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        started = time.perf_counter()
+        exported = 0
+        try:
+            if fmt == 'csv':
+                writer = csv.writer(stream)
+                writer.writerow(FIELDS)
+                for row in rows:
+                    writer.writerow(row)
+                    exported += 1
+            else:
+                for row in rows:
+                    stream.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+                    exported += 1
+        finally:
+            if path != '-':
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        rate = exported / elapsed if elapsed else 0
+        self.stderr.write(f"Exported {exported} questions in {elapsed:.2f}s ({rate:.0f} rows/s).")
@@ -0,0 +1,98 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from quizapp.forms import QuestionForm
+from quizapp.models import Question
+from quizapp.http_cache import invalidate_pages
+from quizapp.question_bank import bump_version
+
+
+def read_csv(stream):
+    for line_no, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, row
+
+
+def read_jsonl(stream):
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_no, exc
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = "Stream questions from a CSV or JSONL file into the question bank."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument('--format', choices=READERS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Rows inserted per transaction (default: 1000).")
+        parser.add_argument('--strict', action='store_true',
+                            help="Abort on the first invalid row instead of skipping it.")
+
+    def handle(self, *args, path, format, batch_size, strict, **options):
+        fmt = format or path.rsplit('.', 1)[-1].lower()
+        if fmt not in READERS:
+            raise CommandError("Cannot infer the format; pass --format csv or --format jsonl.")
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        started = time.perf_counter()
+        imported = skipped = 0
+        batch = []
+        try:
+            for line_no, row in READERS[fmt](stream):
+                question, error = self._validate(row)
+                if question is not None:
+                    batch.append(question)
+                    if len(batch) >= batch_size:
+                        imported += self._insert(batch)
+                        batch = []
+                    continue
+                if strict:
+                    raise CommandError(f"Line {line_no}: {error}")
+                skipped += 1
+                self.stderr.write(f"Line {line_no}: {error}")
+            imported += self._insert(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if imported:
+                bump_version()
+                invalidate_pages()
+
+        elapsed = time.perf_counter() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} questions, skipped {skipped} in {elapsed:.2f}s ({rate:.0f} rows/s)."
+        ))
+
+    def _validate(self, row):
+        """Return ``(question, None)`` for a valid row or ``(None, error)``."""
+        if isinstance(row, Exception):
+            return None, str(row)
+        if not isinstance(row, dict):
+            return None, "expected an object with question fields"
+        form = QuestionForm(data=row)
+        if not form.is_valid():
+            return None, '; '.join(
+                f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()
+            )
+        return form.save(commit=False), None
+
+    def _insert(self, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            Question.objects.bulk_create(batch)
+        return len(batch)
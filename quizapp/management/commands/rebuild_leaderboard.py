@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from quizapp import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recompute player stats from stored attempts and rebuild the cached leaderboard."
+
+    def handle(self, *args, **options):
+        players = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt leaderboard from {players} players."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quizapp import question_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-question analytics (difficulty, option picks, discrimination) from stored answers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help="Answers read per query (default: 10000).")
+
+    def handle(self, *args, chunk_size, **options):
+        questions = question_stats.rebuild(chunk_size=chunk_size)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed stats for {questions} questions."))
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quizapp import leaderboard, question_stats
+from quizapp.grading import encode, grade_answers, score_percentage
+from quizapp.models import AttemptAnswer, Question, QuizAttempt
+
+UPDATE_BATCH = 500
+
+
+class Command(BaseCommand):
+    help = ("Rescore every stored quiz attempt against the current answer key, then rebuild "
+            "the leaderboard and question stats. Attempts missing answers to deleted "
+            "questions keep their score.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Attempts graded per batch (default: 5000).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would change without writing.")
+
+    def handle(self, *args, chunk_size, dry_run, **options):
+        key = {pk: encode(correct) for pk, correct in Question.objects.values_list('id', 'correct').iterator()}
+
+        graded = changed = flipped = skipped = 0
+        last_id = 0
+        while True:
+            attempts = list(
+                QuizAttempt.objects.filter(id__gt=last_id).order_by('id')
+                .only('id', 'score', 'total', 'percentage')[:chunk_size]
+            )
+            if not attempts:
+                break
+            last_id = attempts[-1].id
+            batch_changed, batch_flipped, batch_skipped = self._regrade(attempts, key, dry_run)
+            changed += batch_changed
+            flipped += batch_flipped
+            skipped += batch_skipped
+            graded += len(attempts) - batch_skipped
+
+        verb = "would change" if dry_run else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Regraded {graded} attempts; {changed} scores and {flipped} answers {verb}."
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {skipped} attempts with answers to deleted questions; their scores were kept."
+            ))
+        if (changed or flipped) and not dry_run:
+            # PlayerStats and the cached top-K list fold in scores, QuestionStats
+            # also each answer's correctness, which can change with the score unchanged.
+            players = leaderboard.rebuild()
+            questions = question_stats.rebuild()
+            self.stdout.write(f"Rebuilt the leaderboard ({players} players) and stats for {questions} questions.")
+
+    def _regrade(self, attempts, key, dry_run):
+        positions = {attempt.id: i for i, attempt in enumerate(attempts)}
+        rows = list(
+            AttemptAnswer.objects.filter(attempt_id__gte=attempts[0].id, attempt_id__lte=attempts[-1].id)
+            .values_list('id', 'attempt_id', 'question_id', 'selected', 'is_correct')
+        )
+        # Deleting a question deletes its answers, so an attempt with fewer
+        # answers than questions can no longer be scored out of its total.
+        counts = [0] * len(attempts)
+        for row in rows:
+            counts[positions[row[1]]] += 1
+        complete = [count == attempt.total for attempt, count in zip(attempts, counts)]
+        rows = [row for row in rows if complete[positions[row[1]]]]
+
+        correct, scores, _ = grade_answers(
+            [positions[row[1]] for row in rows],
+            [encode(row[3]) for row in rows],
+            [key.get(row[2], 0) for row in rows],
+            len(attempts),
+        )
+
+        now_correct = [row[0] for row, ok in zip(rows, correct) if ok and not row[4]]
+        now_wrong = [row[0] for row, ok in zip(rows, correct) if not ok and row[4]]
+        changed = []
+        for attempt, score, is_complete in zip(attempts, scores, complete):
+            if is_complete and attempt.score != score:
+                attempt.score = score
+                attempt.percentage = score_percentage(score, attempt.total)
+                changed.append(attempt)
+
+        if not dry_run:
+            with transaction.atomic():
+                for ids, value in ((now_correct, True), (now_wrong, False)):
+                    for start in range(0, len(ids), UPDATE_BATCH):
+                        AttemptAnswer.objects.filter(id__in=ids[start:start + UPDATE_BATCH]).update(is_correct=value)
+                QuizAttempt.objects.bulk_update(changed, ['score', 'percentage'], batch_size=UPDATE_BATCH)
+        return len(changed), len(now_correct) + len(now_wrong), complete.count(False)
@@ -0,0 +1,66 @@
+import gc
+import multiprocessing
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from quizapp import jobs
+from quizapp.cache import is_shared
+
+
+def _worker(batch_size, poll_interval):
+    django.setup()
+    # Never share the parent's connections across a fork.
+    connections.close_all()
+    try:
+        jobs.work(batch_size=batch_size, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (quiz submission bookkeeping, ...) on a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help="Worker processes (default: QUIZ_JOB_WORKERS).")
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help="Jobs claimed per round trip (default: 10).")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty (default: 1).")
+        parser.add_argument('--once', action='store_true',
+                            help="Process the due jobs in this process and exit.")
+
+    def handle(self, *args, processes, batch_size, poll_interval, once, **options):
+        if not is_shared():
+            self.stderr.write(self.style.WARNING(
+                "QUIZ_CACHE_ALIAS is a per-process cache: web processes will only see leaderboard "
+                "changes once their copy expires (QUIZ_LEADERBOARD_TIMEOUT). Set QUIZ_REDIS_URL to share it."
+            ))
+        if once:
+            processed = jobs.work(batch_size=batch_size, once=True)
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs."))
+            return
+
+        processes = processes or getattr(settings, 'QUIZ_JOB_WORKERS', 2)
+        connections.close_all()
+        # Keep the imported modules out of the collector so the forked workers
+        # share their pages instead of copying them (see quizapp.preload).
+        gc.freeze()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(batch_size, poll_interval), name=f'quiz-worker-{i}')
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {processes} job workers; Ctrl-C to stop."))
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
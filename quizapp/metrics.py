@@ -0,0 +1,142 @@
+"""
+Per-view latency and query instrumentation.
+
+``quizapp.middleware.MetricsMiddleware`` gives every request a
+``QueryRecorder`` and hands the wall time, query count and DB time to
+``record_request``. The recorder is found through a context variable by
+``record_queries``, an ``execute_wrapper`` that ``QuizappConfig.ready``
+installs on every new connection; asgiref copies the context into
+``sync_to_async`` threads, so async views' queries are counted too, whichever
+thread runs them. ``record_request`` files the numbers per URL
+name into in-memory histograms. Each observation is a bisect into a fixed
+bucket list plus a few integer increments under a lock. The histograms are
+cumulative, as Prometheus expects (windows come from ``rate()`` on the
+scraper side), and ``MetricsView`` serves them in the Prometheus text format.
+Every process keeps its own registry, so scrape each worker separately.
+
+Requests that run more than ``QUIZ_METRICS_QUERY_THRESHOLD`` queries, or
+repeat one statement ``QUIZ_METRICS_REPEAT_THRESHOLD`` times (the usual N+1
+signature), are logged as warnings on the ``quizapp.metrics`` logger.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class Registry:
+    METRICS = (
+        ('quizapp_request_duration_seconds', 'Wall time per request.', LATENCY_BUCKETS),
+        ('quizapp_db_queries', 'Database queries per request.', QUERY_BUCKETS),
+        ('quizapp_db_duration_seconds', 'Database time per request.', LATENCY_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, duration, queries, db_time):
+        with self._lock:
+            histograms = self._views.get(view)
+            if histograms is None:
+                histograms = self._views[view] = [Histogram(b) for _, _, b in self.METRICS]
+            for histogram, value in zip(histograms, (duration, queries, db_time)):
+                histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for index, (name, help_text, _) in enumerate(self.METRICS):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histograms in sorted(self._views.items()):
+                    lines.extend(histograms[index].render(name, f'view="{view}"'))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class QueryRecorder:
+    """``execute_wrapper`` callable that counts statements and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+
+current_recorder = ContextVar('quizapp_query_recorder', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    """``execute_wrapper`` on every connection; feeds the current request's recorder."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def record_request(view, duration, recorder):
+    """File one request's timings and warn about query-heavy views."""
+    registry.observe(view, duration, recorder.count, recorder.time)
+
+    query_threshold = getattr(settings, 'QUIZ_METRICS_QUERY_THRESHOLD', 20)
+    repeat_threshold = getattr(settings, 'QUIZ_METRICS_REPEAT_THRESHOLD', 5)
+    if recorder.count > query_threshold:
+        logger.warning("%s ran %d queries (%.1f ms)", view, recorder.count, recorder.time * 1000)
+    if recorder.statements:
+        sql, repeats = recorder.statements.most_common(1)[0]
+        if repeats >= repeat_threshold:
+            logger.warning("Possible N+1 in %s: statement ran %d times: %s", view, repeats, sql)
@@ -0,0 +1,68 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .metrics import QueryRecorder, current_recorder, record_request
+from .roles import get_request_roles
+
+
+class MetricsMiddleware:
+    """
+    Times each request and counts its queries; goes first in MIDDLEWARE.
+
+    Sync and async capable, so under ASGI it does not push every request
+    through a thread; the queries are picked up by ``metrics.record_queries``
+    on whichever thread runs them.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self._finish(request, recorder, started)
+        return response
+
+    async def __acall__(self, request):
+        recorder, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self._finish(request, recorder, started)
+        return response
+
+    def _start(self):
+        recorder = QueryRecorder()
+        return recorder, current_recorder.set(recorder), time.perf_counter()
+
+    def _finish(self, request, recorder, started):
+        match = request.resolver_match
+        record_request(match.view_name if match else 'unresolved', time.perf_counter() - started, recorder)
+
+
+class RoleMiddleware:
+    """Attaches ``request.roles``; must come after AuthenticationMiddleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # Returns the coroutine unchanged when the chain is async.
+        request.roles = SimpleLazyObject(lambda: get_request_roles(request))
+        return self.get_response(request)
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.18 on 2026-10-18 12:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('attempted', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('percentage', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='quizapp.player')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AttemptAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selected', models.CharField(blank=True, max_length=1)),
+                ('is_correct', models.BooleanField(default=False)),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='quizapp.quizattempt')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='quizapp.question')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['player', 'created_at'], name='quizapp_qui_player__1d8c33_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.18 on 2026-10-18 12:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0002_quizattempt_attemptanswer_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('total_questions', models.PositiveIntegerField(default=0)),
+                ('best_percentage', models.FloatField(default=0)),
+                ('last_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='quizapp.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-total_score', '-best_percentage'], name='quizapp_pla_total_s_50aed9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# Full-text index over Question.text for the admin search. It is an
+# external-content FTS5 table kept in sync by triggers, so bulk_create and raw
+# SQL writes are indexed too. Only created on SQLite; other backends fall back
+# to a LIKE search in quizapp.search.
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE quizapp_question_fts USING fts5(
+        text, content='quizapp_question', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER quizapp_question_fts_ai AFTER INSERT ON quizapp_question BEGIN
+        INSERT INTO quizapp_question_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER quizapp_question_fts_ad AFTER DELETE ON quizapp_question BEGIN
+        INSERT INTO quizapp_question_fts(quizapp_question_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER quizapp_question_fts_au AFTER UPDATE OF text ON quizapp_question BEGIN
+        INSERT INTO quizapp_question_fts(quizapp_question_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO quizapp_question_fts(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    "INSERT INTO quizapp_question_fts(quizapp_question_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS quizapp_question_fts_au",
+    "DROP TRIGGER IF EXISTS quizapp_question_fts_ad",
+    "DROP TRIGGER IF EXISTS quizapp_question_fts_ai",
+    "DROP TABLE IF EXISTS quizapp_question_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in CREATE_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0003_playerstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
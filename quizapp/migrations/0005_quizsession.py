@@ -0,0 +1,25 @@
+# Generated by Django 4.2.18 on 2026-10-18 12:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0004_question_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_ids', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('deadline', models.DateTimeField(blank=True, null=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_sessions', to='quizapp.player')),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.18 on 2026-10-18 12:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0006_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quizapp.question')),
+                ('served', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('picked_a', models.PositiveIntegerField(default=0)),
+                ('picked_b', models.PositiveIntegerField(default=0)),
+                ('picked_c', models.PositiveIntegerField(default=0)),
+                ('picked_d', models.PositiveIntegerField(default=0)),
+                ('sum_score', models.FloatField(default=0)),
+                ('sum_score_sq', models.FloatField(default=0)),
+                ('sum_correct_score', models.FloatField(default=0)),
+            ],
+        ),
+    ]
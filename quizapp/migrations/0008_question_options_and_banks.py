@@ -0,0 +1,125 @@
+# Generated by Django 4.2.18 on 2026-10-18 13:00
+
+import importlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQLite applies most of these operations by rebuilding quizapp_question,
+# which drops the full-text triggers from 0004; they are recreated (and the
+# index rebuilt) once the table has its final shape, in either direction.
+fts = importlib.import_module('quizapp.migrations.0004_question_fts')
+
+OPTION_COLUMNS = ['option_a', 'option_b', 'option_c', 'option_d']
+
+
+def recreate_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in fts.DROP_SQL[:3] + fts.CREATE_SQL[1:]:
+            schema_editor.execute(sql)
+
+
+def columns_to_options(apps, schema_editor):
+    Question = apps.get_model('quizapp', 'Question')
+    batch = []
+    for question in Question.objects.only('id', *OPTION_COLUMNS).iterator(chunk_size=2000):
+        options = [getattr(question, name) or '' for name in OPTION_COLUMNS]
+        while options and not options[-1]:
+            options.pop()
+        question.options = options
+        batch.append(question)
+        if len(batch) == 2000:
+            Question.objects.bulk_update(batch, ['options'])
+            batch = []
+    Question.objects.bulk_update(batch, ['options'])
+
+
+def options_to_columns(apps, schema_editor):
+    Question = apps.get_model('quizapp', 'Question')
+    batch = []
+    for question in Question.objects.only('id', 'options').iterator(chunk_size=2000):
+        options = list(question.options) + [''] * 4
+        for name, value in zip(OPTION_COLUMNS, options):
+            setattr(question, name, value)
+        batch.append(question)
+        if len(batch) == 2000:
+            Question.objects.bulk_update(batch, OPTION_COLUMNS)
+            batch = []
+    Question.objects.bulk_update(batch, OPTION_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizapp', '0007_questionstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_fts_triggers),
+        migrations.CreateModel(
+            name='QuestionBank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.CharField(blank=True, max_length=300)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='options',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='category',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='difficulty',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Easy'), (2, 'Medium'), (3, 'Hard')], default=2),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='bank',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='questions', to='quizapp.questionbank'),
+        ),
+        migrations.RunPython(columns_to_options, options_to_columns),
+        # blank=True is state only; it lets the reverse re-add the columns with '' for existing rows.
+        migrations.AlterField(
+            model_name='question',
+            name='option_a',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='option_b',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='option_a',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='option_b',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='option_c',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='option_d',
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['bank', 'category', 'difficulty'], name='quizapp_que_bank_id_2c7239_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['category', 'difficulty'], name='quizapp_que_categor_b8823a_idx'),
+        ),
+        migrations.RunPython(recreate_fts_triggers, migrations.RunPython.noop),
+    ]
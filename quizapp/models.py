@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .roles import bump_version as bump_roles_version
 
 class Player(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='player_profile')
@@ -18,30 +21,201 @@ class AdminProfile(models.Model):
     def __str__(self):
         return f"Admin: {self.user.username}"
 
-# Simple question model for quiz page (optional extensible)
+class QuestionBank(models.Model):
+    # A named collection of questions a quiz can be drawn from
+    name = models.CharField(max_length=100, unique=True)
+    description = models.CharField(max_length=300, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+def _option_property(index):
+    # option_a..option_d read and write positions in Question.options, so forms,
+    # imports and Question(option_a=...) keep working on the compact list.
+    def getter(self):
+        return self.options[index] if index < len(self.options) else ''
+
+    def setter(self, value):
+        options = list(self.options) + [''] * (index + 1 - len(self.options))
+        options[index] = value or ''
+        while options and not options[-1]:
+            options.pop()
+        self.options = options
+
+    return property(getter, setter)
+
+
 class Question(models.Model):
+    EASY, MEDIUM, HARD = 1, 2, 3
+    DIFFICULTY_CHOICES = [(EASY, 'Easy'), (MEDIUM, 'Medium'), (HARD, 'Hard')]
+
     text = models.CharField(max_length=512)
-    option_a = models.CharField(max_length=200)
-    option_b = models.CharField(max_length=200)
-    option_c = models.CharField(max_length=200, blank=True)
-    option_d = models.CharField(max_length=200, blank=True)
+    # Option texts in A, B, C, D order; trailing blank options are not stored.
+    options = models.JSONField(default=list)
     correct = models.CharField(max_length=1, choices=[('A','A'),('B','B'),('C','C'),('D','D')])
+    bank = models.ForeignKey(QuestionBank, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='questions')
+    category = models.CharField(max_length=50, blank=True)
+    difficulty = models.PositiveSmallIntegerField(choices=DIFFICULTY_CHOICES, default=MEDIUM)
+
+    option_a = _option_property(0)
+    option_b = _option_property(1)
+    option_c = _option_property(2)
+    option_d = _option_property(3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bank', 'category', 'difficulty']),
+            models.Index(fields=['category', 'difficulty']),
+        ]
 
     def __str__(self):
         return self.text
 
+class QuizSession(models.Model):
+    # One served quiz: which questions were drawn and when it must be submitted by
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='quiz_sessions')
+    question_ids = models.JSONField(default=list)
+    started_at = models.DateTimeField(auto_now_add=True)
+    deadline = models.DateTimeField(null=True, blank=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.player} @ {self.started_at:%Y-%m-%d %H:%M}"
+
+class QuizAttempt(models.Model):
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='attempts')
+    score = models.PositiveIntegerField(default=0)
+    attempted = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    percentage = models.FloatField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['player', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.player}: {self.score}/{self.total}"
+
+class AttemptAnswer(models.Model):
+    attempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
+    selected = models.CharField(max_length=1, blank=True)
+    is_correct = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.attempt_id}/{self.question_id}: {self.selected or '-'}"
+
+class PlayerStats(models.Model):
+    # Denormalized per-player totals, updated on every graded submission
+    player = models.OneToOneField(Player, on_delete=models.CASCADE, related_name='stats')
+    attempts = models.PositiveIntegerField(default=0)
+    total_score = models.PositiveIntegerField(default=0)
+    total_questions = models.PositiveIntegerField(default=0)
+    best_percentage = models.FloatField(default=0)
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-total_score', '-best_percentage'])]
+
+    def __str__(self):
+        return f"{self.player}: {self.total_score}"
+
+class QuestionStats(models.Model):
+    # Per-question difficulty, kept up to date by every recorded submission
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    served = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    picked_a = models.PositiveIntegerField(default=0)
+    picked_b = models.PositiveIntegerField(default=0)
+    picked_c = models.PositiveIntegerField(default=0)
+    picked_d = models.PositiveIntegerField(default=0)
+    # Running sums over the attempts that served the question, with x the
+    # attempt's score fraction: enough for the point-biserial discrimination.
+    sum_score = models.FloatField(default=0)
+    sum_score_sq = models.FloatField(default=0)
+    sum_correct_score = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.question_id}: {self.correct}/{self.served}"
+
+    @property
+    def skipped(self):
+        return self.served - self.picked_a - self.picked_b - self.picked_c - self.picked_d
+
+    @property
+    def correct_rate(self):
+        return self.correct / self.served if self.served else None
+
+    @property
+    def discrimination(self):
+        """Point-biserial correlation between answering correctly and the attempt score."""
+        n, n1 = self.served, self.correct
+        if n < 2 or n1 in (0, n):
+            return None
+        mean = self.sum_score / n
+        variance = self.sum_score_sq / n - mean * mean
+        if variance <= 1e-12:
+            return None
+        mean_right = self.sum_correct_score / n1
+        mean_wrong = (self.sum_score - self.sum_correct_score) / (n - n1)
+        p = n1 / n
+        return (mean_right - mean_wrong) / variance ** 0.5 * (p * (1 - p)) ** 0.5
+
+class Job(models.Model):
+    # Background work queued by the views and run by `manage.py run_workers`
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
 @receiver(post_save, sender=User)
-def create_profiles(sender, instance, created, **kwargs):
+def create_profiles(sender, instance, created, update_fields=None, **kwargs):
     if created:
-        # create a Player profile by default (you can toggle admin manually via admin site)
-        Player.objects.get_or_create(user=instance)
+        # create a Player profile by default (you can toggle admin manually via admin site),
+        # unless the caller attached one to save itself (PlayerRegistrationForm does);
+        # checking the cache avoids a query for a row that cannot exist yet
+        if not User.player_profile.related.is_cached(instance):
+            Player.objects.create(user=instance)
         # AdminProfile only created when is_staff True
         if instance.is_staff:
-            AdminProfile.objects.get_or_create(user=instance)
+            AdminProfile.objects.create(user=instance)
+        return
 
-@receiver(post_save, sender=User)
-def save_profiles(sender, instance, **kwargs):
-    if hasattr(instance, 'player_profile'):
-        instance.player_profile.save()
-    if hasattr(instance, 'admin_profile'):
-        instance.admin_profile.save()
+    # Saves that cannot have changed is_staff (e.g. login only writes last_login)
+    # need no profile work at all.
+    if update_fields is not None and 'is_staff' not in update_fields:
+        return
+    # is_staff may have changed: make existing sessions resolve their roles again.
+    bump_roles_version(instance.pk)
+    if instance.is_staff and not hasattr(instance, 'admin_profile'):
+        AdminProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=AdminProfile)
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=AdminProfile)
+@receiver(post_delete, sender=Player)
+def forget_roles(sender, instance, created=False, **kwargs):
+    # Role claims record which profiles exist, so only creation and deletion matter.
+    if created or kwargs['signal'] is post_delete:
+        bump_roles_version(instance.user_id)
@@ -0,0 +1,40 @@
+"""
+Import-time warm-up for preforking servers.
+
+``myapp.wsgi`` calls ``preload`` when ``QUIZ_PRELOAD`` is set (the default in
+the prod profile). Run under ``gunicorn --preload``, the master process then
+imports every view, builds the URL resolver and compiles every project
+template once, and the forked workers inherit all of it instead of paying for
+it on their first requests. ``gc.freeze()`` moves the warmed objects out of the
+collector's generations: the collector writes to every object it scans, which
+would otherwise copy the shared pages into each worker one by one.
+
+Nothing here may open a database connection; connections must not cross a
+fork.
+"""
+import gc
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import get_resolver
+
+
+def _template_names():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith('.html'):
+                    yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+def preload():
+    """Warm URLs, views and templates, then freeze them for copy-on-write sharing."""
+    get_resolver().url_patterns  # imports every urls and views module
+    engine = engines['django']
+    for name in _template_names():
+        engine.get_template(name)
+    # Anything above that touched the database must not leak into the workers.
+    connections.close_all()
+    gc.freeze()
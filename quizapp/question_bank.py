@@ -0,0 +1,189 @@
+"""
+Cached, versioned view of the question bank used by the quiz views.
+
+A version counter lives in the configured cache (``QUIZ_CACHE_ALIAS``); the
+question admin views bump it after every write, so readers only go back to the
+database when the bank has actually changed.
+
+For each version we keep a dense, sorted index of every question id as a
+compact ``array``. Quizzes are assembled by drawing random positions from that
+index, which costs O(N) in the number of questions served regardless of how
+large the bank is (unlike ``order_by('?')``, which sorts the whole table).
+The rows themselves are cached per version and id. When the alias points at a
+shared backend (Redis, file, ...) everything is published there too, so other
+worker processes can warm up without a query. ``quiz_page.html`` caches each
+question's markup under the same version and id (see ``fragment_context``).
+Each process also keeps the current snapshot in memory for at most
+``QUIZ_SNAPSHOT_TIMEOUT`` seconds. With a process-local cache a bump is only
+seen by the process that made it, so there the version counter itself
+expires after ``QUIZ_SNAPSHOT_TIMEOUT`` and is reseeded: other processes
+serve a stale bank for that long at most.
+The ``a``-prefixed functions are the async twins used by
+``quizapp.async_views``.
+"""
+import random
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from django.conf import settings
+
+from .cache import is_shared, quiz_cache
+from .models import Question
+
+VERSION_KEY = 'quizapp:question_bank:version'
+SNAPSHOT_KEY = 'quizapp:question_bank:ids:{version}'
+QUESTION_KEY = 'quizapp:question_bank:row:{version}:{id}'
+
+
+class QuizQuestion(namedtuple('QuizQuestion', ['id', 'text', 'options', 'correct'])):
+    """The columns the quiz renders and grades; ``options`` as stored on Question."""
+    __slots__ = ()
+
+    @property
+    def choices(self):
+        """``(letter, text)`` for each non-empty option, in order."""
+        return [(letter, text) for letter, text in zip('ABCD', self.options) if text]
+
+QuestionSnapshot = namedtuple('QuestionSnapshot', ['version', 'ids'])
+
+_lock = threading.Lock()
+_local = {'snapshot': None, 'expires': 0.0}
+
+
+def _timeout():
+    return getattr(settings, 'QUIZ_SNAPSHOT_TIMEOUT', 3600)
+
+
+def get_version():
+    """Current question bank version, initialising the counter if needed."""
+    cache = quiz_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a flushed cache never reuses an old version.
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None if is_shared() else _timeout())
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Mark the question bank as changed; call after any question write."""
+    cache = quiz_cache()
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+        version = cache.incr(VERSION_KEY)
+    _local['snapshot'] = None
+    return version
+
+
+def _questions_query():
+    return Question.objects.order_by('id').values_list('id', flat=True)
+
+
+def _rows_query(ids):
+    return Question.objects.filter(id__in=ids).values_list(*QuizQuestion._fields)
+
+
+def _cached_snapshot(version):
+    snapshot = _local['snapshot']
+    if snapshot is not None and snapshot.version == version and time.monotonic() < _local['expires']:
+        return snapshot
+    ids = quiz_cache().get(SNAPSHOT_KEY.format(version=version))
+    if ids is None:
+        return None
+    return _keep_snapshot(version, ids)
+
+
+def _keep_snapshot(version, ids):
+    _local['expires'] = time.monotonic() + _timeout()
+    snapshot = _local['snapshot'] = QuestionSnapshot(version, ids)
+    return snapshot
+
+
+def _store_snapshot(version, ids):
+    quiz_cache().set(SNAPSHOT_KEY.format(version=version), ids, timeout=_timeout())
+    return _keep_snapshot(version, ids)
+
+
+def get_snapshot():
+    """Return the dense id index for the current bank version."""
+    version = get_version()
+    snapshot = _cached_snapshot(version)
+    if snapshot is not None:
+        return snapshot
+
+    with _lock:
+        snapshot = _cached_snapshot(version)
+        if snapshot is None:
+            snapshot = _store_snapshot(version, array('q', _questions_query().iterator(chunk_size=10000)))
+        return snapshot
+
+
+async def aget_snapshot():
+    """Async ``get_snapshot`` for native async views (no thread hop on a cache hit)."""
+    version = get_version()
+    snapshot = _cached_snapshot(version)
+    if snapshot is None:
+        ids = array('q', [pk async for pk in _questions_query()])
+        snapshot = _store_snapshot(version, ids)
+    return snapshot
+
+
+def _sample(ids, count, rng):
+    if count is None:
+        count = getattr(settings, 'QUIZ_QUESTION_COUNT', 5)
+    count = min(count, len(ids))
+    return [ids[i] for i in rng.sample(range(len(ids)), count)]
+
+
+def sample_question_ids(count=None, rng=random):
+    """Draw ``count`` distinct question ids uniformly from the bank."""
+    return _sample(get_snapshot().ids, count, rng)
+
+
+async def asample_question_ids(count=None, rng=random):
+    return _sample((await aget_snapshot()).ids, count, rng)
+
+
+def _cached_rows(ids):
+    version = get_version()
+    keys = {QUESTION_KEY.format(version=version, id=pk): pk for pk in ids}
+    rows = {keys[key]: QuizQuestion(*row) for key, row in quiz_cache().get_many(keys).items()}
+    return version, rows, [pk for pk in ids if pk not in rows]
+
+
+def _store_rows(version, rows, fetched):
+    fetched = {row[0]: QuizQuestion(*row) for row in fetched}
+    quiz_cache().set_many(
+        {QUESTION_KEY.format(version=version, id=pk): tuple(q) for pk, q in fetched.items()},
+        timeout=_timeout(),
+    )
+    rows.update(fetched)
+
+
+def get_questions(ids):
+    """
+    Return the questions for ``ids`` in the given order.
+
+    Ids that no longer exist are dropped. Rows come from the cache and only
+    the misses are fetched, with a single query.
+    """
+    version, rows, missing = _cached_rows(ids)
+    if missing:
+        _store_rows(version, rows, _rows_query(missing))
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+async def aget_questions(ids):
+    version, rows, missing = _cached_rows(ids)
+    if missing:
+        _store_rows(version, rows, [row async for row in _rows_query(missing)])
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+def fragment_context():
+    """Template context for the per-question ``{% cache %}`` fragments."""
+    return {'bank_version': get_version(), 'fragment_timeout': _timeout()}
@@ -0,0 +1,99 @@
+"""
+Per-question analytics.
+
+Every recorded submission folds into ``QuestionStats`` with two statements,
+however many questions were served: an INSERT ... ON CONFLICT DO NOTHING for
+rows that do not exist yet and one UPDATE whose CASE expressions add each
+question's own increments. Reading the stats is then a join on the question
+list (``select_related('stats')``), never an aggregate over attempts.
+
+``rebuild`` recomputes the table from stored answers, streaming them in
+primary key order in fixed-size chunks so memory stays bounded by the
+number of questions; ``manage.py recompute_question_stats`` runs it nightly
+to correct drift (deleted attempts, regrading).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+
+from .models import AttemptAnswer, QuestionStats
+
+OPTION_FIELDS = {'A': 'picked_a', 'B': 'picked_b', 'C': 'picked_c', 'D': 'picked_d'}
+COUNTERS = ['served', 'correct', *OPTION_FIELDS.values(), 'sum_score', 'sum_score_sq', 'sum_correct_score']
+PICK_INDEX = {letter: COUNTERS.index(field) for letter, field in OPTION_FIELDS.items()}
+
+
+def _plus(field, ids, amount=1, output_field=None):
+    output_field = output_field or IntegerField()
+    if not ids:
+        return F(field)
+    return F(field) + Case(When(question_id__in=ids, then=Value(amount)),
+                           default=Value(0 * amount), output_field=output_field)
+
+
+def record(answers, score_fraction):
+    """
+    Fold one graded attempt into the stats. ``answers`` is a sequence of
+    ``(question_id, selected_letter, is_correct)`` and ``score_fraction`` the
+    attempt's score divided by its question count.
+    """
+    if not answers:
+        return
+    ids = [pk for pk, _, _ in answers]
+    right = [pk for pk, _, ok in answers if ok]
+    picked = defaultdict(list)
+    for pk, selected, _ in answers:
+        if selected in OPTION_FIELDS:
+            picked[OPTION_FIELDS[selected]].append(pk)
+
+    x = float(score_fraction)
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=pk) for pk in ids], ignore_conflicts=True
+    )
+    QuestionStats.objects.filter(question_id__in=ids).update(
+        served=F('served') + 1,
+        correct=_plus('correct', right),
+        sum_score=F('sum_score') + x,
+        sum_score_sq=F('sum_score_sq') + x * x,
+        sum_correct_score=_plus('sum_correct_score', right, x, FloatField()),
+        **{field: _plus(field, picked.get(field)) for field in OPTION_FIELDS.values()},
+    )
+
+
+def rebuild(chunk_size=10000):
+    """Recompute every question's stats from the stored answers; returns the row count."""
+    # One small list per question (indexed like COUNTERS) rather than model
+    # instances keeps a million-question bank in memory comfortably.
+    totals = {}
+    last_id = 0
+    while True:
+        rows = list(
+            AttemptAnswer.objects.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'question_id', 'selected', 'is_correct', 'attempt__score', 'attempt__total'
+            )[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for _, question_id, selected, is_correct, score, total in rows:
+            row = totals.get(question_id)
+            if row is None:
+                row = totals[question_id] = [0, 0, 0, 0, 0, 0, 0.0, 0.0, 0.0]
+            x = score / total if total else 0.0
+            row[0] += 1
+            row[6] += x
+            row[7] += x * x
+            if is_correct:
+                row[1] += 1
+                row[8] += x
+            if selected in PICK_INDEX:
+                row[PICK_INDEX[selected]] += 1
+
+    with transaction.atomic():
+        QuestionStats.objects.all().delete()
+        QuestionStats.objects.bulk_create(
+            (QuestionStats(question_id=pk, **dict(zip(COUNTERS, row))) for pk, row in totals.items()),
+            batch_size=1000,
+        )
+    return len(totals)
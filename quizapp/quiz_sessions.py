@@ -0,0 +1,112 @@
+"""
+Timed quiz sessions.
+
+Starting a quiz stores a ``QuizSession`` row (served question ids, start time
+and deadline) and mirrors it in the cache as a small ``ActiveSession`` tuple.
+Submission checks and the SSE countdown read only the cached copy, so they
+need no query on the hot path; the row is the fallback if the cache entry was
+evicted and the durable record once the quiz is submitted.
+
+``QUIZ_TIME_LIMIT`` is the allowed time in seconds (0 disables the deadline)
+and ``QUIZ_DEADLINE_GRACE`` absorbs network latency on the final submit.
+"""
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import quiz_cache
+from .models import QuizSession
+
+SESSION_KEY = 'quizapp:quiz_session:{id}'
+
+ActiveSession = namedtuple('ActiveSession', ['id', 'user_id', 'player_id', 'question_ids', 'deadline'])
+
+
+def time_limit():
+    return getattr(settings, 'QUIZ_TIME_LIMIT', 600)
+
+
+def _grace():
+    return getattr(settings, 'QUIZ_DEADLINE_GRACE', 5)
+
+
+def _new_session(player_id, question_ids):
+    limit = time_limit()
+    deadline = timezone.now() + timedelta(seconds=limit) if limit else None
+    return QuizSession(player_id=player_id, question_ids=list(question_ids), deadline=deadline)
+
+
+def _activate(session, user_id):
+    active = ActiveSession(
+        session.id, user_id, session.player_id, tuple(session.question_ids),
+        session.deadline.timestamp() if session.deadline else None,
+    )
+    timeout = time_limit() + _grace() + 60 if time_limit() else None
+    quiz_cache().set(SESSION_KEY.format(id=session.id), active, timeout=timeout)
+    return active
+
+
+def start_session(user, player_id, question_ids):
+    """Record a served quiz and return its ``ActiveSession``."""
+    session = _new_session(player_id, question_ids)
+    session.save()
+    return _activate(session, user.pk)
+
+
+async def astart_session(user, player_id, question_ids):
+    session = _new_session(player_id, question_ids)
+    await session.asave()
+    return _activate(session, user.pk)
+
+
+def _pending(session_id):
+    return QuizSession.objects.select_related('player').filter(id=session_id, submitted_at__isnull=True)
+
+
+def get_active_session(session_id):
+    """The unsubmitted session ``session_id``, or ``None``."""
+    active = quiz_cache().get(SESSION_KEY.format(id=session_id))
+    if active is None:
+        session = _pending(session_id).first()
+        if session is not None:
+            active = _activate(session, session.player.user_id)
+    return active
+
+
+async def aget_active_session(session_id):
+    active = quiz_cache().get(SESSION_KEY.format(id=session_id))
+    if active is None:
+        session = await _pending(session_id).afirst()
+        if session is not None:
+            active = _activate(session, session.player.user_id)
+    return active
+
+
+def remaining_seconds(active, now=None):
+    """Seconds left before the deadline, or ``None`` for an untimed quiz."""
+    if active.deadline is None:
+        return None
+    return max(0.0, active.deadline - (now or time.time()))
+
+
+def is_open(active):
+    """Whether the session is still cached as active (i.e. not yet submitted)."""
+    return quiz_cache().get(SESSION_KEY.format(id=active.id)) is not None
+
+
+def is_expired(active, now=None):
+    return active.deadline is not None and (now or time.time()) > active.deadline + _grace()
+
+
+def close_session(active):
+    """Stop streaming and accepting submissions for ``active`` (cache only)."""
+    quiz_cache().delete(SESSION_KEY.format(id=active.id))
+
+
+def finish_session(active):
+    """Close the session so it can neither be submitted again nor streamed."""
+    close_session(active)
+    QuizSession.objects.filter(id=active.id).update(submitted_at=timezone.now())
@@ -0,0 +1,105 @@
+"""
+Sliding-window rate limits for the expensive POST endpoints.
+
+Each rule in ``QUIZ_RATE_LIMITS`` counts requests per identity (client IP,
+submitted username or logged-in user id) in fixed slots of ``window``
+seconds and estimates the sliding window as
+
+    current slot + previous slot * (fraction of the window not yet elapsed)
+
+which needs two counters per identity, a constant number of cache operations
+per request and no timestamp lists. Counters live in the ``QUIZ_CACHE_ALIAS``
+cache and expire on their own after two windows; with the default local
+memory cache the limits are per process, with Redis they are global.
+
+``RateLimitMixin`` (and ``AsyncRateLimitMixin`` in ``quizapp.async_views``)
+runs the check at the top of ``dispatch``, before the view touches the
+database or hashes a password, and answers 429 with a Retry-After header once
+any rule is exceeded. Identities are read from REMOTE_ADDR, the POST body and
+the session only, so a rejected request costs a few cache calls.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.http import HttpResponse
+
+from .cache import quiz_cache
+
+COUNTER_KEY = 'quizapp:ratelimit:{scope}:{kind}:{identity}:{window}:{slot}'
+
+
+def _client_ip(request):
+    return request.META.get('REMOTE_ADDR')
+
+
+def _username(request):
+    return request.POST.get('username', '').strip().lower() or None
+
+
+def _session_user(request):
+    return request.session.get(SESSION_KEY)
+
+
+IDENTITIES = {'ip': _client_ip, 'username': _username, 'user': _session_user}
+
+
+def hit(scope, kind, identity, limit, window, now=None):
+    """
+    Count one request for ``identity``; return seconds to wait if the
+    sliding-window count now exceeds ``limit``, else 0.
+    """
+    now = time.time() if now is None else now
+    slot, offset = divmod(now, window)
+    digest = hashlib.md5(str(identity).encode(), usedforsecurity=False).hexdigest()
+    key = COUNTER_KEY.format(scope=scope, kind=kind, identity=digest, window=window, slot=int(slot))
+    previous_key = COUNTER_KEY.format(scope=scope, kind=kind, identity=digest, window=window, slot=int(slot) - 1)
+
+    cache = quiz_cache()
+    cache.add(key, 0, timeout=2 * window)
+    try:
+        current = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr().
+        cache.set(key, 1, timeout=2 * window)
+        current = 1
+    previous = cache.get(previous_key, 0)
+
+    if current + previous * (1 - offset / window) <= limit:
+        return 0
+    return math.ceil(window - offset)
+
+
+def check(scope, request):
+    """Apply every rule for ``scope``; the longest required wait, or 0."""
+    retry_after = 0
+    for kind, limit, window in getattr(settings, 'QUIZ_RATE_LIMITS', {}).get(scope, ()):
+        identity = IDENTITIES[kind](request)
+        if identity is not None:
+            retry_after = max(retry_after, hit(scope, kind, identity, limit, window))
+    return retry_after
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse("Too many attempts. Please try again later.", status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class RateLimitMixin:
+    """
+    Throttles POSTs to the view under ``QUIZ_RATE_LIMITS[rate_limit_scope]``.
+    List it before any access-control mixin so rejected requests never reach
+    the database.
+    """
+    rate_limit_scope = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            retry_after = check(self.rate_limit_scope, request)
+            if retry_after:
+                return too_many_requests(retry_after)
+        return super().dispatch(request, *args, **kwargs)
+
@@ -0,0 +1,117 @@
+"""
+Per-request role resolution.
+
+A user's roles (admin and/or player) are resolved with a single query that
+LEFT JOINs both profile tables, then remembered in the session as a small
+claim tied to the user id. ``RoleMiddleware`` exposes them lazily as
+``request.roles``, so the access mixins and views check roles without any
+profile lookups once the claim exists. The claim is refreshed on every login.
+
+The claim records which profiles exist, not ``is_staff``: that is read from
+``request.user`` on every check. It also carries the user's role version,
+kept in the ``QUIZ_CACHE_ALIAS`` cache; the profile signals in
+``quizapp.models`` call ``bump_version`` whenever ``is_staff`` or a profile
+changes, and a claim with an older version is resolved again. With a
+process-local cache other processes never see the bump, so there the version
+expires after ``QUIZ_ROLES_TIMEOUT`` seconds and every claim is resolved
+again at least that often.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from .cache import is_shared, quiz_cache
+
+SESSION_KEY = '_quiz_roles'
+VERSION_KEY = 'quizapp:roles:version:{user_id}'
+
+Roles = namedtuple('Roles', ['is_admin', 'is_player', 'admin_profile'], defaults=(False,))
+NO_ROLES = Roles(False, False)
+
+
+def _timeout():
+    return None if is_shared() else getattr(settings, 'QUIZ_ROLES_TIMEOUT', 300)
+
+
+def get_version(user_id):
+    """Role version of the user, initialising the counter if needed."""
+    cache = quiz_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a flushed cache never reuses an old version.
+        cache.add(key, time.time_ns() // 1000, timeout=_timeout())
+        version = cache.get(key)
+    return version
+
+
+def bump_version(user_id):
+    """Invalidate every role claim of the user; call after a role change."""
+    cache = quiz_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_version(user_id)
+        return cache.incr(key)
+
+
+def _profiles_query(user):
+    return User.objects.filter(pk=user.pk).values_list('admin_profile__id', 'player_profile__id')
+
+
+def _roles(user, profiles):
+    admin_id, player_id = profiles or (None, None)
+    return Roles(user.is_staff or admin_id is not None, player_id is not None, admin_id is not None)
+
+
+def resolve_roles(user):
+    """Look up the roles of ``user`` with at most one query."""
+    if not user.is_authenticated:
+        return NO_ROLES
+    return _roles(user, _profiles_query(user).first())
+
+
+async def aresolve_roles(user):
+    if not user.is_authenticated:
+        return NO_ROLES
+    return _roles(user, await _profiles_query(user).afirst())
+
+
+def remember_roles(request, user, roles):
+    request.session[SESSION_KEY] = [user.pk, get_version(user.pk), roles.admin_profile, roles.is_player]
+    request._quiz_roles = roles
+
+
+def _claimed_roles(request, user):
+    roles = getattr(request, '_quiz_roles', None)
+    if roles is None and not user.is_authenticated:
+        roles = NO_ROLES
+    elif roles is None:
+        claim = request.session.get(SESSION_KEY)
+        if claim and len(claim) == 4 and claim[0] == user.pk and claim[1] == get_version(user.pk):
+            _, _, admin_profile, is_player = claim
+            roles = Roles(user.is_staff or admin_profile, is_player, admin_profile)
+    if roles is not None:
+        request._quiz_roles = roles
+    return roles
+
+
+def get_request_roles(request):
+    """Roles of ``request.user``, from the request, the session claim or the database."""
+    user = request.user
+    roles = _claimed_roles(request, user)
+    if roles is None:
+        roles = resolve_roles(user)
+        remember_roles(request, user, roles)
+    return roles
+
+
+async def aget_request_roles(request, user):
+    roles = _claimed_roles(request, user)
+    if roles is None:
+        roles = await aresolve_roles(user)
+        remember_roles(request, user, roles)
+    return roles
@@ -0,0 +1,44 @@
+"""
+Question bank search.
+
+On SQLite the lookup goes through the ``quizapp_question_fts`` FTS5 index
+(see migration 0004) ranked by bm25; other backends fall back to a
+case-insensitive LIKE on the question text.
+"""
+from django.db import connection
+
+from .models import Question
+
+
+def _match_expression(query):
+    # Quote every term so user input can never be parsed as FTS5 syntax, and
+    # let the last one match as a prefix for search-as-you-type.
+    terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_questions(query, limit=50, queryset=None):
+    """
+    Return up to ``limit`` questions matching ``query``, best match first,
+    loaded through ``queryset`` (default: all questions).
+    """
+    expression = _match_expression(query)
+    if not expression:
+        return []
+
+    if queryset is None:
+        queryset = Question.objects.all()
+    if connection.vendor != 'sqlite':
+        return list(queryset.filter(text__icontains=query.strip()).order_by('id')[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT rowid FROM quizapp_question_fts WHERE quizapp_question_fts MATCH %s '
+            'ORDER BY rank LIMIT %s',
+            [expression, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    questions = queryset.in_bulk(ids)
+    return [questions[pk] for pk in ids if pk in questions]
@@ -0,0 +1,148 @@
+"""
+Static asset build and serving without a CDN or reverse proxy.
+
+``CompressedManifestStaticFilesStorage`` is the ``collectstatic`` step: on top
+of Django's manifest storage (content-hashed names such as
+``styles.3f2a9c1b.css``, rewritten ``url()`` references) it writes ``.gz``
+and, when the optional ``brotli`` package is installed, ``.br`` variants of
+every text asset.
+
+``StaticFilesApp`` wraps the WSGI application (see ``myapp.wsgi``) and
+answers ``STATIC_URL`` requests straight from ``STATIC_ROOT``. The directory
+is indexed once at startup, so a request is a dict lookup: no filesystem
+walk, no path joining, and nothing outside the collected files can be
+served. Hashed names get a one-year ``immutable`` Cache-Control; the
+unhashed originals a short max-age. The smallest variant the client accepts
+is sent. Run ``collectstatic`` before starting the server; files added later
+are picked up on the next restart.
+"""
+import gzip
+import json
+import mimetypes
+import os
+from collections import namedtuple
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.xml', '.map')
+# Preferred first; only variants actually written by collectstatic are offered.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+
+Asset = namedtuple('Asset', ['path', 'headers', 'etag', 'variants'])
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        names = set(paths)
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if processed and not isinstance(processed, Exception):
+                names.add(hashed_name)
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name in sorted(names):
+                if name.endswith(COMPRESSIBLE):
+                    self._compress(self.path(name))
+
+    def _compress(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+
+
+class StaticFilesApp:
+    """WSGI middleware serving the collected static files."""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = '/' + (prefix or settings.STATIC_URL).strip('/') + '/'
+        self.files = self._index() if self.root and os.path.isdir(self.root) else {}
+
+    def _index(self):
+        immutable = set()
+        manifest = os.path.join(self.root, ManifestStaticFilesStorage.manifest_name)
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                immutable.update(json.load(f).get('paths', {}).values())
+
+        files = {}
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if filename.endswith(('.gz', '.br')) or path == manifest:
+                    continue
+                files[name] = self._asset(path, IMMUTABLE if name in immutable else REVALIDATE)
+        return files
+
+    def _asset(self, path, cache_control):
+        stat = os.stat(path)
+        content_type, _ = mimetypes.guess_type(path)
+        if content_type is None:
+            content_type = 'application/octet-stream'
+        elif content_type.startswith('text/') or content_type.endswith(('javascript', 'json', 'xml')):
+            content_type += '; charset=utf-8'
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        headers = [
+            ('Content-Type', content_type),
+            ('Cache-Control', cache_control),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('ETag', etag),
+        ]
+        variants = [
+            (encoding, path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODINGS if os.path.exists(path + suffix)
+        ]
+        if variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+        variants.append((None, path, stat.st_size))
+        return Asset(path, headers, etag, variants)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        asset = self.files.get(path[len(self.prefix):]) if path.startswith(self.prefix) else None
+        if asset is None:
+            return self.application(environ, start_response)
+
+        method = environ['REQUEST_METHOD']
+        if method not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD')])
+            return [b'']
+        if asset.etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', asset.headers)
+            return [b'']
+
+        encoding, file_path, size = self._choose(asset, environ.get('HTTP_ACCEPT_ENCODING', ''))
+        headers = asset.headers + [('Content-Length', str(size))]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return [b'']
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(file_path, 'rb'))
+
+    def _choose(self, asset, accept_encoding):
+        accepted = {
+            part.split(';')[0].strip() for part in accept_encoding.split(',')
+            if not part.replace(' ', '').endswith(';q=0')
+        }
+        for variant in asset.variants:
+            if variant[0] is None or variant[0] in accepted:
+                return variant
@@ -0,0 +1,65 @@
+"""
+Job handlers (see ``quizapp.jobs``) and the helpers views use to queue them.
+
+A graded quiz is recorded by ``record_submission``: the view closes the
+cached session, queues the job under the quiz session id and returns the
+score straight away; a worker later stores the attempt and its answers,
+marks the session submitted and updates the leaderboard and question stats. The session row
+doubles as the "already done" marker, so a retried or duplicated job
+records the submission once. Answers to questions deleted before the job
+ran are dropped; the score shown to the player still counts them.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import leaderboard, question_stats
+from .attempts import record_attempt
+from .grading import decode, encode
+from .jobs import aenqueue, enqueue, task
+from .models import Player, Question, QuizSession
+from .question_bank import QuizQuestion
+from .quiz_sessions import close_session
+
+RECORD_SUBMISSION = 'quiz.record_submission'
+
+
+def _submission(active, questions, answers, result):
+    payload = {
+        'session_id': active.id,
+        'player_id': active.player_id,
+        'answers': [[q.id, answers.get(q.id, ''), q.correct] for q in questions],
+        'result': result,
+    }
+    return RECORD_SUBMISSION, payload, f'quiz-session:{active.id}'
+
+
+def submit(active, questions, answers, result):
+    """Close ``active`` and queue the bookkeeping for its graded submission."""
+    close_session(active)
+    return enqueue(*_submission(active, questions, answers, result))
+
+
+async def asubmit(active, questions, answers, result):
+    close_session(active)
+    return await aenqueue(*_submission(active, questions, answers, result))
+
+
+@task(RECORD_SUBMISSION)
+def record_submission(session_id, player_id, answers, result):
+    with transaction.atomic():
+        marked = QuizSession.objects.filter(id=session_id, submitted_at__isnull=True).update(
+            submitted_at=timezone.now()
+        )
+        if not marked:
+            return
+        player = Player.objects.select_related('user').get(id=player_id)
+        existing = set(Question.objects.filter(id__in=[pk for pk, _, _ in answers]).values_list('id', flat=True))
+        # Views only queue A-D; this also cleans jobs queued before they did.
+        answers = [(pk, decode(encode(selected)), correct) for pk, selected, correct in answers if pk in existing]
+        questions = [QuizQuestion(pk, '', (), correct) for pk, _, correct in answers]
+        record_attempt(player, questions, {pk: selected for pk, selected, _ in answers if selected}, result)
+        leaderboard.record_result(player, result)
+        question_stats.record(
+            [(pk, selected, selected == correct) for pk, selected, correct in answers],
+            result['score'] / result['total'] if result['total'] else 0,
+        )
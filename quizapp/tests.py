@@ -1,3 +1,998 @@
-from django.test import TestCase
+import gc
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from . import (
+    grading, jobs, leaderboard, metrics, question_stats, quiz_sessions, ratelimit, urls as quiz_urls,
+    views as quiz_views,
+)
+from .middleware import MetricsMiddleware
+from .http_cache import CACHED_PAGES, PAGE_KEY, AnonymousPageCacheMixin
+from .preload import preload
+from .staticfiles import IMMUTABLE, StaticFilesApp
+from .forms import PlayerRegistrationForm, QuestionForm
+from .attempts import record_attempt
+from .models import (
+    AdminProfile, AttemptAnswer, Job, Player, PlayerStats, Question, QuestionBank, QuestionStats,
+    QuizAttempt, QuizSession,
+)
+from .question_bank import bump_version, get_questions, get_snapshot, sample_question_ids
+from .roles import SESSION_KEY as ROLES_SESSION_KEY, get_version as get_roles_version, resolve_roles
+from .tasks import record_submission
+
+
+def make_question(text='2 + 2?', correct='B'):
+    return Question.objects.create(
+        text=text, option_a='3', option_b='4', option_c='5', option_d='', correct=correct
+    )
+
+
+class QuestionBankSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bump_version()
+
+    def test_snapshot_is_served_from_cache_until_version_bump(self):
+        make_question()
+        self.assertEqual(len(get_snapshot().ids), 1)
+
+        make_question('3 + 3?')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_snapshot().ids), 1)
+
+        bump_version()
+        self.assertEqual(len(get_snapshot().ids), 2)
+
+    def test_process_local_version_expires(self):
+        make_question()
+        self.assertEqual(len(get_snapshot().ids), 1)
+
+        # Another process adds a question and bumps its own copy of the version.
+        make_question('3 + 3?')
+        later = time.monotonic() + settings.QUIZ_SNAPSHOT_TIMEOUT + 1
+        with mock.patch('time.monotonic', return_value=later), \
+                mock.patch('time.time', return_value=time.time() + settings.QUIZ_SNAPSHOT_TIMEOUT + 1):
+            self.assertEqual(len(get_snapshot().ids), 2)
+
+    def test_sampling_draws_distinct_ids_and_caches_rows(self):
+        ids = {make_question(f'Q{i}').id for i in range(20)}
+        bump_version()
+
+        sample = sample_question_ids(5)
+        self.assertEqual(len(set(sample)), 5)
+        self.assertTrue(set(sample) <= ids)
+
+        self.assertEqual([q.id for q in get_questions(sample)], sample)
+        with self.assertNumQueries(0):
+            self.assertEqual([q.id for q in get_questions(sample)], sample)
+
+    def test_question_create_view_bumps_version(self):
+        User.objects.create_user('boss', password='pw', is_staff=True)
+        self.client.login(username='boss', password='pw')
+        version = get_snapshot().version
+
+        self.client.post(reverse('quizapp:add_question'), {
+            'text': 'Capital of France?', 'option_a': 'Paris', 'option_b': 'Rome',
+            'option_c': '', 'option_d': '', 'correct': 'A',
+        })
+
+        snapshot = get_snapshot()
+        self.assertGreater(snapshot.version, version)
+        self.assertEqual([q.text for q in get_questions(snapshot.ids)], ['Capital of France?'])
+
+    def test_quiz_rows_load_only_rendered_columns(self):
+        question = make_question()
+        with CaptureQueriesContext(connection) as ctx:
+            [row] = get_questions([question.id])
+        self.assertNotIn('category', ctx.captured_queries[0]['sql'])
+        self.assertEqual(row.choices, [('A', '3'), ('B', '4'), ('C', '5')])
+
+
+class QuizAttemptPersistenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bump_version()
+        self.user = User.objects.create_user('player', password='pw')
+        self.q1 = make_question('2 + 2?', 'B')
+        self.q2 = make_question('3 + 3?', 'A')
+
+    def test_quiz_post_stores_attempt_and_answers(self):
+        self.client.login(username='player', password='pw')
+        self.client.get(reverse('quizapp:quiz_page'))
+        response = self.client.post(reverse('quizapp:quiz_page'), {f'question_{self.q1.id}': 'B'})
+        self.assertEqual(response.context['score'], 1)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+        self.assertEqual(jobs.work(once=True), 1)
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual((attempt.score, attempt.attempted, attempt.total), (1, 1, 2))
+        answers = {a.question_id: (a.selected, a.is_correct) for a in attempt.answers.all()}
+        self.assertEqual(answers, {self.q1.id: ('B', True), self.q2.id: ('', False)})
+
+    def test_answers_are_written_with_one_insert(self):
+        questions = get_questions(get_snapshot().ids)
+        result = {'score': 0, 'attempted': 2, 'total': 2, 'percentage': 0}
+        answers = {self.q1.id: 'A', self.q2.id: 'B'}
+        # savepoint, attempt insert, answers bulk insert, release
+        with self.assertNumQueries(4):
+            record_attempt(self.user.player_profile, questions, answers, result)
+
+
+@override_settings(QUIZ_JOBS_EAGER=True)
+class QuizAssemblyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('player', password='pw')
+        self.questions = [make_question(f'Q{i}', 'A') for i in range(12)]
+        bump_version()
+        self.client.login(username='player', password='pw')
+
+    def test_post_grades_exactly_the_served_questions(self):
+        response = self.client.get(reverse('quizapp:quiz_page'))
+        served = [q.id for q in response.context['questions']]
+        self.assertEqual(len(served), 5)
+        quiz_session = QuizSession.objects.get(id=self.client.session['quiz_session_id'])
+        self.assertEqual(quiz_session.question_ids, served)
+
+        response = self.client.post(
+            reverse('quizapp:quiz_page'), {f'question_{pk}': 'A' for pk in served[:3]}
+        )
+        self.assertEqual((response.context['score'], response.context['total']), (3, 5))
+        answered = set(AttemptAnswer.objects.values_list('question_id', flat=True))
+        self.assertEqual(answered, set(served))
+
+    def test_unknown_option_counts_as_not_attempted(self):
+        response = self.client.get(reverse('quizapp:quiz_page'))
+        first, second = [q.id for q in response.context['questions']][:2]
+
+        response = self.client.post(
+            reverse('quizapp:quiz_page'), {f'question_{first}': 'ZZZZZZ', f'question_{second}': 'A'}
+        )
+        self.assertEqual((response.context['score'], response.context['attempted']), (1, 1))
+        self.assertEqual(AttemptAnswer.objects.get(question_id=first).selected, '')
+
+    def test_post_without_served_set_redirects(self):
+        response = self.client.post(reverse('quizapp:quiz_page'), {})
+        self.assertRedirects(response, reverse('quizapp:quiz_page'))
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_question_fragments_follow_the_bank_version(self):
+        Question.objects.exclude(pk=self.questions[0].pk).delete()
+        bump_version()
+        self.assertContains(self.client.get(reverse('quizapp:quiz_page')), 'Q0')
+
+        Question.objects.filter(pk=self.questions[0].pk).update(text='Edited')
+        self.assertContains(self.client.get(reverse('quizapp:quiz_page')), 'Q0')
+        bump_version()
+        response = self.client.get(reverse('quizapp:quiz_page'))
+        self.assertContains(response, '1. Edited')
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+
+class GradingEngineTests(TestCase):
+    def test_grade_batch_scores_each_submission(self):
+        key = [grading.encode(c) for c in 'ABCD']
+        submissions = [
+            [grading.encode(c) for c in 'ABCD'],
+            [grading.encode(c) for c in 'AB'] + [0, 0],
+            [grading.encode(c) for c in 'DCBA'],
+        ]
+        results = grading.grade_batch(key, submissions)
+        self.assertEqual(
+            [(r['score'], r['attempted'], r['percentage']) for r in results],
+            [(4, 4, 100.0), (2, 2, 50.0), (0, 4, 0.0)],
+        )
+
+    def test_python_fallback_matches_numpy(self):
+        key = [1, 2, 3]
+        submissions = [[1, 0, 3], [2, 2, 0], [0, 0, 0]]
+        expected = grading.grade_batch(key, submissions)
+        np, grading.np = grading.np, None
+        try:
+            self.assertEqual(grading.grade_batch(key, submissions), expected)
+            self.assertEqual(grading.grade_answers([0, 0, 1], [1, 2, 2], [1, 1, 2], 2),
+                             ([True, False, True], [1, 1], [2, 1]))
+        finally:
+            grading.np = np
+
+    def test_regrade_attempts_applies_key_fix(self):
+        cache.clear()
+        bump_version()
+        user = User.objects.create_user('player', password='pw')
+        question = make_question('2 + 2?', 'A')
+        questions = get_questions([question.id])
+        answers = {question.id: 'B'}
+        record_attempt(user.player_profile, questions, answers, grading.grade_submission(questions, answers))
+
+        Question.objects.filter(id=question.id).update(correct='B')
+        call_command('regrade_attempts', stdout=StringIO())
+
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual((attempt.score, attempt.percentage), (1, 100.0))
+        self.assertTrue(attempt.answers.get().is_correct)
+        self.assertEqual(PlayerStats.objects.get().total_score, 1)
+        self.assertEqual(QuestionStats.objects.get(question=question).correct, 1)
+
+    def test_regrade_rebuilds_question_stats_when_only_answers_flip(self):
+        cache.clear()
+        bump_version()
+        user = User.objects.create_user('player', password='pw')
+        first, second = make_question('2 + 2?', 'A'), make_question('3 + 3?', 'A')
+        questions = get_questions([first.id, second.id])
+        answers = {first.id: 'A', second.id: 'B'}
+        record_attempt(user.player_profile, questions, answers, grading.grade_submission(questions, answers))
+
+        Question.objects.update(correct='B')
+        out = StringIO()
+        call_command('regrade_attempts', stdout=out)
+
+        self.assertIn("0 scores and 2 answers changed", out.getvalue())
+        self.assertEqual(QuizAttempt.objects.get().score, 1)
+        correct = dict(QuestionStats.objects.values_list('question_id', 'correct'))
+        self.assertEqual(correct, {first.id: 0, second.id: 1})
+
+    def test_regrade_keeps_scores_of_attempts_with_deleted_questions(self):
+        cache.clear()
+        bump_version()
+        user = User.objects.create_user('player', password='pw')
+        kept, deleted = make_question('2 + 2?', 'B'), make_question('3 + 3?', 'A')
+        questions = get_questions([kept.id, deleted.id])
+        answers = {kept.id: 'B', deleted.id: 'A'}
+        record_attempt(user.player_profile, questions, answers, grading.grade_submission(questions, answers))
+
+        deleted.delete()
+        out = StringIO()
+        call_command('regrade_attempts', stdout=out)
+
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual((attempt.score, attempt.total), (2, 2))
+        self.assertIn("Skipped 1 attempts", out.getvalue())
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.players = [
+            User.objects.create_user(f'p{i}', password='pw').player_profile for i in range(3)
+        ]
+
+    def result(self, score, total=5):
+        return {'score': score, 'attempted': total, 'total': total,
+                'percentage': grading.score_percentage(score, total)}
+
+    def test_submissions_update_stats_and_ranking_incrementally(self):
+        leaderboard.record_result(self.players[0], self.result(2))
+        leaderboard.record_result(self.players[1], self.result(4))
+        leaderboard.record_result(self.players[0], self.result(3))
+
+        stats = PlayerStats.objects.get(player=self.players[0])
+        self.assertEqual((stats.attempts, stats.total_score, stats.best_percentage), (2, 5, 60.0))
+        with self.assertNumQueries(0):
+            top = leaderboard.get_top()
+        self.assertEqual([(e.name, e.total_score) for e in top], [('p0', 5), ('p1', 4)])
+
+    def test_cached_list_expires_to_pick_up_other_processes_updates(self):
+        self.assertEqual(leaderboard.get_top(), [])
+        # A job worker with its own local-memory cache only updates the table.
+        PlayerStats.objects.create(player=self.players[2], attempts=1, total_score=4, total_questions=5,
+                                   best_percentage=80.0)
+        self.assertEqual(leaderboard.get_top(), [])
+
+        later = time.time() + settings.QUIZ_LEADERBOARD_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual([e.name for e in leaderboard.get_top()], ['p2'])
+
+    def test_rebuild_matches_incremental_state(self):
+        for player, score in zip(self.players, (1, 5, 3)):
+            QuizAttempt.objects.create(player=player, score=score, attempted=5, total=5,
+                                       percentage=score * 20.0)
+        call_command('rebuild_leaderboard', stdout=StringIO())
+
+        self.assertEqual([e.name for e in leaderboard.get_top()], ['p1', 'p2', 'p0'])
+        self.assertEqual(PlayerStats.objects.get(player=self.players[1]).attempts, 1)
+
+    def test_leaderboard_view_paginates_cached_list(self):
+        with self.settings(QUIZ_LEADERBOARD_SIZE=2):
+            for player, score in zip(self.players, (1, 5, 3)):
+                leaderboard.record_result(player, self.result(score))
+            self.client.login(username='p0', password='pw')
+            response = self.client.get(reverse('quizapp:leaderboard'))
+        self.assertEqual([e.name for e in response.context['entries']], ['p1', 'p2'])
+
+    def test_anonymous_visitors_are_redirected_like_on_other_player_pages(self):
+        response = self.client.get(reverse('quizapp:leaderboard'))
+        self.assertRedirects(response, reverse('quizapp:homepage'), fetch_redirect_response=False)
+
+
+class QuestionImportExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(content)
+        return path
+
+    def test_import_csv_in_batches_and_skip_invalid_rows(self):
+        path = self.write('bank.csv', (
+            'text,option_a,option_b,option_c,option_d,correct\n'
+            'Q1,a,b,,,A\n'
+            'Q2,a,b,c,,C\n'
+            'Q3,a,b,,,D\n'
+            'Q4,a,b,,,B\n'
+        ))
+        err = StringIO()
+        call_command('import_questions', path, batch_size=2, stdout=StringIO(), stderr=err)
+
+        self.assertEqual(list(Question.objects.order_by('id').values_list('text', flat=True)),
+                         ['Q1', 'Q2', 'Q4'])
+        self.assertIn('Line 4', err.getvalue())
+
+    def test_export_jsonl_round_trips_through_import(self):
+        make_question('2 + 2?', 'B')
+        path = os.path.join(self.tmp.name, 'bank.jsonl')
+        call_command('export_questions', path, stderr=StringIO())
+        Question.objects.all().delete()
+
+        call_command('import_questions', path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Question.objects.get().correct, 'B')
+
+    def test_options_are_stored_compactly_and_exported_as_columns(self):
+        question = make_question('2 + 2?', 'B')
+        self.assertEqual(Question.objects.get().options, ['3', '4', '5'])
+        self.assertEqual((question.option_c, question.option_d), ('5', ''))
+
+        out = StringIO()
+        call_command('export_questions', '-', format='csv', stdout=out, stderr=StringIO())
+        header, row = out.getvalue().splitlines()
+        self.assertEqual(header, 'id,text,option_a,option_b,option_c,option_d,correct,bank,category,difficulty')
+        self.assertEqual(row, f'{question.id},2 + 2?,3,4,5,,B,,,2')
+
+    def test_question_form_rejects_empty_correct_option(self):
+        form = QuestionForm(data={'text': 'Q', 'option_a': 'a', 'option_b': 'b', 'correct': 'D'})
+        self.assertFalse(form.is_valid())
+
+
+class ProfileSyncTests(TestCase):
+    def register(self):
+        return self.client.post(reverse('quizapp:player_register'), {
+            'username': 'newbie', 'email': 'newbie@example.com',
+            'password': 'pw', 'display_name': 'Newbie',
+        })
+
+    def test_registration_creates_user_and_player_once(self):
+        # username check, savepoint, user insert, player insert, release
+        with self.assertNumQueries(5):
+            response = self.register()
+        self.assertRedirects(response, reverse('quizapp:player_login'), fetch_redirect_response=False)
+        player = Player.objects.get(user__username='newbie')
+        self.assertEqual(player.display_name, 'Newbie')
+        self.assertTrue(player.user.check_password('pw'))
+
+    def test_registration_form_honours_commit_false(self):
+        form = PlayerRegistrationForm(data={'username': 'newbie', 'email': 'newbie@example.com', 'password': 'pw'})
+        self.assertTrue(form.is_valid())
+        with self.assertNumQueries(0):
+            player = form.save(commit=False)
+        self.assertEqual(player.display_name, 'newbie')
+
+        player.user.save()
+        player.save()
+        self.assertEqual(Player.objects.get().user.username, 'newbie')
+
+    def test_login_does_not_resave_profiles(self):
+        User.objects.create_user('player', password='pw')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('quizapp:player_login'), {'username': 'player', 'password': 'pw'})
+        self.assertRedirects(response, reverse('quizapp:player_common'), fetch_redirect_response=False)
+        # user + player lookups, last_login update and the session writes
+        self.assertEqual(len(ctx.captured_queries), 10)
+        self.assertFalse([q for q in ctx.captured_queries if 'UPDATE "quizapp_' in q['sql']])
+
+    def test_promoting_to_staff_creates_admin_profile(self):
+        user = User.objects.create_user('player', password='pw')
+        user.is_staff = True
+        user.save()
+        self.assertTrue(AdminProfile.objects.filter(user=user).exists())
+
+
+class RoleResolutionTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create_user('player', password='pw')
+        self.admin = User.objects.create_user('boss', password='pw', is_staff=True)
+
+    def test_resolve_roles_uses_one_query(self):
+        with self.assertNumQueries(1):
+            roles = resolve_roles(self.player)
+        self.assertEqual((roles.is_admin, roles.is_player), (False, True))
+
+    def test_login_stores_role_claim_and_views_reuse_it(self):
+        self.client.post(reverse('quizapp:player_login'), {'username': 'player', 'password': 'pw'})
+        self.assertEqual(self.client.session[ROLES_SESSION_KEY],
+                         [self.player.pk, get_roles_version(self.player.pk), False, True])
+
+        # the user lookup only: the session is cached and the role check is free
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('quizapp:player_common'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_demoted_admin_loses_access(self):
+        self.client.post(reverse('quizapp:admin_login'), {'username': 'boss', 'password': 'pw'})
+        self.assertEqual(self.client.get(reverse('quizapp:questions_list')).status_code, 200)
+
+        self.admin.is_staff = False
+        self.admin.save()
+        AdminProfile.objects.filter(user=self.admin).delete()
+        self.assertRedirects(self.client.get(reverse('quizapp:questions_list')),
+                             reverse('quizapp:homepage'), fetch_redirect_response=False)
+
+    def test_process_local_role_version_expires(self):
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        self.client.post(reverse('quizapp:admin_login'), {'username': 'boss', 'password': 'pw'})
+        url = reverse('quizapp:questions_list')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        # Another process removes the profile; its bump never reaches this cache.
+        with mock.patch('quizapp.models.bump_roles_version'):
+            AdminProfile.objects.filter(user=self.admin).delete()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with mock.patch('time.time', return_value=time.time() + settings.QUIZ_ROLES_TIMEOUT + 1):
+            self.assertRedirects(self.client.get(url), reverse('quizapp:homepage'), fetch_redirect_response=False)
+
+    def test_staff_flag_is_read_at_check_time(self):
+        AdminProfile.objects.filter(user=self.admin).delete()
+        self.client.post(reverse('quizapp:admin_login'), {'username': 'boss', 'password': 'pw'})
+        # a bulk update sends no signal, so only the live is_staff check sees it
+        User.objects.filter(pk=self.admin.pk).update(is_staff=False)
+        self.assertRedirects(self.client.get(reverse('quizapp:questions_list')),
+                             reverse('quizapp:homepage'), fetch_redirect_response=False)
+
+    def test_home_redirects_by_role(self):
+        self.client.login(username='boss', password='pw')
+        self.assertRedirects(self.client.get(reverse('quizapp:homepage')),
+                             reverse('quizapp:admin_home'))
+        self.client.login(username='player', password='pw')
+        self.assertRedirects(self.client.get(reverse('quizapp:homepage')),
+                             reverse('quizapp:player_common'))
+
+    def test_player_cannot_reach_admin_views(self):
+        question = make_question()
+        self.client.login(username='player', password='pw')
+        response = self.client.get(reverse('quizapp:edit_question', args=[question.pk]))
+        self.assertRedirects(response, reverse('quizapp:homepage'), fetch_redirect_response=False)
+
+
+class QuestionBankBrowsingTests(TestCase):
+    def setUp(self):
+        User.objects.create_user('boss', password='pw', is_staff=True)
+        self.client.login(username='boss', password='pw')
+        self.questions = [make_question(f'Question {i}') for i in range(7)]
+
+    def ids(self, response):
+        return [q.id for q in response.context['questions']]
+
+    def test_admin_creates_a_bank_to_file_questions_under(self):
+        response = self.client.post(reverse('quizapp:add_question_bank'), {'name': 'Maths', 'description': ''})
+        self.assertRedirects(response, reverse('quizapp:add_question'), fetch_redirect_response=False)
+        bank = QuestionBank.objects.get(name='Maths')
+        self.assertIn(bank, self.client.get(reverse('quizapp:questions_list')).context['banks'])
+
+        self.client.logout()
+        User.objects.create_user('player', password='pw')
+        self.client.login(username='player', password='pw')
+        self.client.post(reverse('quizapp:add_question_bank'), {'name': 'Sneaky'})
+        self.assertFalse(QuestionBank.objects.filter(name='Sneaky').exists())
+
+    def test_keyset_pages_forward_and_back_without_count(self):
+        url = reverse('quizapp:questions_list')
+        first = self.client.get(url)
+        self.assertEqual(self.ids(first), [q.id for q in self.questions[:3]])
+        self.assertFalse(first.context['has_previous'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url, {'after': first.context['last_id']})
+        self.assertEqual(self.ids(second), [q.id for q in self.questions[3:6]])
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql']])
+
+        back = self.client.get(url, {'before': second.context['first_id']})
+        self.assertEqual(self.ids(back), self.ids(first))
+        self.assertFalse(back.context['has_previous'])
+
+    def test_filters_by_bank_category_and_difficulty(self):
+        bank = QuestionBank.objects.create(name='Geography')
+        capitals = make_question('Capital of Peru?')
+        Question.objects.filter(id=capitals.id).update(bank=bank, category='capitals', difficulty=Question.HARD)
+        url = reverse('quizapp:questions_list')
+
+        response = self.client.get(url, {'bank': bank.id, 'category': 'capitals', 'difficulty': '3'})
+        self.assertEqual(self.ids(response), [capitals.id])
+        self.assertEqual(self.ids(self.client.get(url, {'category': 'capitals', 'difficulty': '1'})), [])
+        self.assertEqual(len(self.client.get(url, {'difficulty': 'x'}).context['questions']), 3)
+
+    def test_search_uses_fulltext_index_kept_in_sync(self):
+        target = make_question('What is the capital of France?')
+        Question.objects.bulk_create([Question(text='Capital letters in Python?', option_a='a',
+                                               option_b='b', correct='A')])
+        url = reverse('quizapp:search_questions')
+
+        self.assertEqual(self.ids(self.client.get(url, {'q': 'capital fra'})), [target.id])
+        self.assertEqual(len(self.client.get(url, {'q': 'capital'}).context['questions']), 2)
+
+        target.text = 'Largest ocean?'
+        target.save()
+        self.assertEqual(self.ids(self.client.get(url, {'q': 'ocean'})), [target.id])
+        self.assertEqual(self.ids(self.client.get(url, {'q': '"unbalanced'})), [])
+
+
+@contextmanager
+def async_player_views():
+    """Route the player pages to quizapp.async_views for the duration."""
+    def reload():
+        importlib.reload(quiz_urls)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    try:
+        with override_settings(QUIZ_ASYNC_VIEWS=True):
+            reload()
+            yield
+    finally:
+        reload()
+
+
+@override_settings(QUIZ_JOBS_EAGER=True)
+class AsyncQuizViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player', password='pw')
+        self.questions = [make_question(f'Q{i}', 'A') for i in range(6)]
+        bump_version()
+        self.async_client.force_login(self.user)
+
+    async def test_async_quiz_round_trip(self):
+        with async_player_views():
+            response = await self.async_client.get(reverse('quizapp:quiz_page'))
+            self.assertTrue(response.resolver_match.func.view_class.view_is_async)
+            served = [q.id for q in response.context['questions']]
+            self.assertEqual(len(served), 5)
+
+            response = await self.async_client.post(
+                reverse('quizapp:quiz_page'), {f'question_{pk}': 'A' for pk in served[:2]}
+            )
+        self.assertEqual((response.context['score'], response.context['total']), (2, 5))
+        self.assertEqual(await QuizAttempt.objects.filter(player__user=self.user).acount(), 1)
+
+    async def test_async_pages_require_a_player(self):
+        with async_player_views():
+            response = await AsyncClient().get(reverse('quizapp:player_common'))
+        self.assertRedirects(response, reverse('quizapp:homepage'), fetch_redirect_response=False)
+
+
+@override_settings(QUIZ_JOBS_EAGER=True)
+class TimedQuizSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player', password='pw')
+        for i in range(3):
+            make_question(f'Q{i}', 'A')
+        bump_version()
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def test_submission_is_validated_from_cache(self):
+        self.client.get(reverse('quizapp:quiz_page'))
+        session_id = self.client.session['quiz_session_id']
+        active = quiz_sessions.get_active_session(session_id)
+        with self.assertNumQueries(0):
+            self.assertEqual(quiz_sessions.get_active_session(session_id), active)
+            self.assertFalse(quiz_sessions.is_expired(active))
+
+        self.client.post(reverse('quizapp:quiz_page'), {})
+        self.assertIsNotNone(QuizSession.objects.get(id=session_id).submitted_at)
+        self.assertIsNone(quiz_sessions.get_active_session(session_id))
+
+    def test_late_submission_is_rejected(self):
+        self.client.get(reverse('quizapp:quiz_page'))
+        active = quiz_sessions.get_active_session(self.client.session['quiz_session_id'])
+        with mock.patch('quizapp.quiz_sessions.time.time', return_value=active.deadline + 60):
+            response = self.client.post(reverse('quizapp:quiz_page'), {})
+        self.assertRedirects(response, reverse('quizapp:player_common'), fetch_redirect_response=False)
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    @override_settings(QUIZ_TIME_LIMIT=1)
+    async def test_countdown_stream_ends_at_deadline(self):
+        player = await Player.objects.aget(user=self.user)
+        active = await quiz_sessions.astart_session(self.user, player.id, [])
+
+        response = await self.async_client.get(reverse('quizapp:quiz_countdown', args=[active.id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('data: 1\n\n', events)
+        self.assertTrue(events.endswith('event: expired\ndata: 0\n\n'))
+
+    async def test_countdown_stream_is_private(self):
+        player = await Player.objects.aget(user=self.user)
+        active = await quiz_sessions.astart_session(self.user, player.id, [])
+        response = await AsyncClient().get(reverse('quizapp:quiz_countdown', args=[active.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(QUIZ_JOBS_EAGER=True)
+class HttpCachingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player', password='pw')
+        for i in range(3):
+            make_question(f'Q{i}', 'A')
+        bump_version()
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_player_home_revalidates_without_queries_until_the_bank_changes(self):
+        self.client.force_login(self.user)
+        url = reverse('quizapp:player_common')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('private', first['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, first).status_code, 304)
+
+        bump_version()
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_tag_follows_the_logged_in_user(self):
+        self.client.force_login(self.user)
+        url = reverse('quizapp:player_common')
+        first = self.client.get(url)
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+    def test_quiz_page_replays_an_unfinished_quiz(self):
+        self.client.force_login(self.user)
+        url = reverse('quizapp:quiz_page')
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        self.assertEqual(QuizSession.objects.count(), 1)
+
+        self.client.post(url, {})
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+        self.assertEqual(QuizSession.objects.count(), 2)
+
+    def test_replayed_quiz_page_reads_the_time_left_from_the_server(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('quizapp:quiz_page'))
+        remaining_url = reverse('quizapp:quiz_remaining', args=[self.client.session['quiz_session_id']])
+
+        with self.assertNumQueries(1):  # the user; the session is cached
+            remaining = self.client.get(remaining_url).json()['remaining']
+        self.assertTrue(0 < remaining <= settings.QUIZ_TIME_LIMIT)
+
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(remaining_url).status_code, 404)
+
+    def test_pages_with_messages_are_not_tagged(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('quizapp:quiz_page'), {})  # flashes "Please start the quiz"
+        response = self.client.get(reverse('quizapp:player_common'))
+        self.assertContains(response, 'Please start the quiz')
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_anonymous_homepage_is_cached_until_a_question_changes(self):
+        url = reverse('quizapp:homepage')
+        self.client.get(url)
+        self.assertIsNotNone(cache.get(PAGE_KEY.format(name='home')))
+        with self.assertNumQueries(0), self.assertTemplateNotUsed('quizapp/home_page.html'):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        User.objects.create_user('boss', password='pw', is_staff=True)
+        self.client.login(username='boss', password='pw')
+        self.client.post(reverse('quizapp:add_question'), {
+            'text': 'New?', 'option_a': 'a', 'option_b': 'b', 'correct': 'A',
+        })
+        self.assertIsNone(cache.get(PAGE_KEY.format(name='home')))
+
+    def test_every_cached_page_is_invalidated(self):
+        names = {view.page_cache_name for view in vars(quiz_views).values()
+                 if isinstance(view, type) and issubclass(view, AnonymousPageCacheMixin)}
+        self.assertLessEqual(names - {None}, set(CACHED_PAGES))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.admin = User.objects.create_user('boss', password='pw', is_staff=True)
+        self.player = User.objects.create_user('player', password='pw')
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse('quizapp:homepage'))
+        self.client.force_login(self.admin)
+        body = self.client.get(reverse('quizapp:metrics')).content.decode()
+        self.assertIn('quizapp_request_duration_seconds_count{view="quizapp:homepage"} 1', body)
+        self.assertIn('quizapp_db_queries_bucket{view="quizapp:homepage",le="0"} 1', body)
+
+    def test_endpoint_is_staff_or_token_only(self):
+        self.client.force_login(self.player)
+        self.assertEqual(self.client.get(reverse('quizapp:metrics')).status_code, 403)
+        with override_settings(QUIZ_METRICS_TOKEN='s3cret'):
+            response = self.client_class().get(
+                reverse('quizapp:metrics'), HTTP_AUTHORIZATION='Bearer s3cret'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_async_requests_stay_on_the_loop_and_count_their_queries(self):
+        async def view(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(view)))
+
+        await sync_to_async(self.async_client.force_login)(self.player)
+        with async_player_views():
+            response = await self.async_client.get(reverse('quizapp:player_common'))
+        self.assertEqual(response.status_code, 200)
+        body = metrics.registry.render()
+        self.assertIn('quizapp_request_duration_seconds_count{view="quizapp:player_common"} 1', body)
+        # the user and player lookups, run by sync_to_async on another thread
+        self.assertNotIn('quizapp_db_queries_bucket{view="quizapp:player_common",le="0"} 1', body)
+
+    @override_settings(QUIZ_METRICS_REPEAT_THRESHOLD=3)
+    def test_repeated_statements_are_flagged(self):
+        recorder = metrics.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for question in [make_question(f'Q{i}') for i in range(3)]:
+                Question.objects.get(pk=question.pk)
+        with self.assertLogs('quizapp.metrics', 'WARNING') as logs:
+            metrics.record_request('quizapp:questions_list', 0.01, recorder)
+        self.assertIn('Possible N+1 in quizapp:questions_list', logs.output[0])
+
+
+class StaticPipelineTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        storages = dict(settings.STORAGES, staticfiles={
+            'BACKEND': 'quizapp.staticfiles.CompressedManifestStaticFilesStorage',
+        })
+        with override_settings(STATIC_ROOT=tmp.name, STORAGES=storages):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        self.app = StaticFilesApp(lambda environ, start_response: 'django', root=tmp.name)
+        self.hashed = next(name for name in self.app.files
+                           if name.startswith('css/styles.') and name != 'css/styles.css')
+
+    def get(self, name, **headers):
+        response = {}
+
+        def start_response(status, response_headers):
+            response.update(response_headers, status=status)
+
+        environ = dict({'PATH_INFO': f'/static/{name}', 'REQUEST_METHOD': 'GET'}, **headers)
+        body = self.app(environ, start_response)
+        return response, body
+
+    def test_hashed_assets_are_immutable_and_precompressed(self):
+        response, body = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['status'], '200 OK')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(b''.join(body)))
+
+        response, _ = self.get('css/styles.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotEqual(response['Cache-Control'], IMMUTABLE)
+
+    def test_revalidation_and_fallthrough(self):
+        etag = self.get(self.hashed)[0]['ETag']
+        self.assertEqual(self.get(self.hashed, HTTP_IF_NONE_MATCH=etag)[0]['status'], '304 Not Modified')
+        self.assertEqual(self.get('../db.sqlite3')[1], 'django')
+        self.assertEqual(self.get('staticfiles.json')[1], 'django')
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('player', password='pw')
+
+    def test_sliding_window_weighs_the_previous_slot(self):
+        for _ in range(4):
+            self.assertEqual(ratelimit.hit('t', 'ip', '1.2.3.4', 4, 60, now=119), 0)
+        # 15s into the next slot, 3/4 of the previous 4 still count.
+        self.assertEqual(ratelimit.hit('t', 'ip', '1.2.3.4', 4, 60, now=135), 0)
+        self.assertEqual(ratelimit.hit('t', 'ip', '1.2.3.4', 4, 60, now=135), 45)
+        self.assertEqual(ratelimit.hit('t', 'ip', '1.2.3.4', 4, 60, now=179), 0)
+
+    @override_settings(QUIZ_RATE_LIMITS={'login': [('username', 2, 60)]})
+    def test_login_burst_is_rejected_before_any_query(self):
+        url = reverse('quizapp:player_login')
+        for _ in range(2):
+            self.client.post(url, {'username': 'Player', 'password': 'wrong'})
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'username': 'player', 'password': 'pw'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # other accounts are unaffected
+        self.assertEqual(self.client.post(url, {'username': 'other', 'password': 'pw'}).status_code, 200)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        jobs.TASKS['test.record'] = lambda **payload: self.calls.append(payload)
+        self.addCleanup(jobs.TASKS.pop, 'test.record')
+
+    def test_idempotency_key_queues_once(self):
+        first = jobs.enqueue('test.record', {'n': 1}, key='once')
+        self.assertEqual(jobs.enqueue('test.record', {'n': 2}, key='once').pk, first.pk)
+        self.assertEqual(jobs.work(once=True), 1)
+        self.assertEqual(self.calls, [{'n': 1}])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_failures_are_retried_then_given_up(self):
+        def flaky(**payload):
+            raise RuntimeError("boom")
+        jobs.TASKS['test.record'] = flaky
+        job = jobs.enqueue('test.record', {}, max_attempts=2)
+
+        with self.assertLogs('quizapp.jobs', 'ERROR'):
+            self.assertFalse(jobs.run(jobs.claim(10)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(jobs.claim(10), [])
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('quizapp.jobs', 'ERROR'):
+            jobs.run(jobs.claim(10)[0])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+    def test_quiz_submission_is_recorded_once(self):
+        User.objects.create_user('player', password='pw')
+        question = make_question()
+        bump_version()
+        self.client.login(username='player', password='pw')
+        self.client.get(reverse('quizapp:quiz_page'))
+        session_id = self.client.session['quiz_session_id']
+        self.client.post(reverse('quizapp:quiz_page'), {f'question_{question.pk}': 'B'})
+
+        job = Job.objects.get(idempotency_key=f'quiz-session:{session_id}')
+        # a redelivered job (e.g. after a worker crash) must not double count
+        jobs.run(job)
+        jobs.run(job)
+        self.assertEqual(QuizAttempt.objects.get().score, 1)
+        self.assertEqual(PlayerStats.objects.get().attempts, 1)
+        self.assertIsNotNone(QuizSession.objects.get(id=session_id).submitted_at)
+
+    def test_question_deleted_before_the_job_runs(self):
+        User.objects.create_user('player', password='pw')
+        kept, deleted = make_question('Kept?'), make_question('Deleted?')
+        bump_version()
+        self.client.login(username='player', password='pw')
+        self.client.get(reverse('quizapp:quiz_page'))
+        self.client.post(reverse('quizapp:quiz_page'), {f'question_{kept.pk}': 'B', f'question_{deleted.pk}': 'B'})
+        deleted.delete()
+
+        self.assertEqual(jobs.work(once=True), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        attempt = QuizAttempt.objects.get()
+        self.assertEqual([a.question_id for a in attempt.answers.all()], [kept.pk])
+        self.assertEqual(list(QuestionStats.objects.values_list('question_id', flat=True)), [kept.pk])
+        self.assertEqual(PlayerStats.objects.get().total_score, 2)
+
+
+class QuestionStatsTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create_user('player', password='pw').player_profile
+        self.easy = make_question('Easy', 'A')
+        self.hard = make_question('Hard', 'B')
+        bump_version()
+
+    def submit(self, easy, hard):
+        answers = [[self.easy.pk, easy, 'A'], [self.hard.pk, hard, 'B']]
+        score = (easy == 'A') + (hard == 'B')
+        player = Player.objects.get(pk=self.player.pk)
+        active = quiz_sessions.start_session(player.user, player.pk, [self.easy.pk, self.hard.pk])
+        record_submission(
+            session_id=active.id, player_id=player.pk, answers=answers,
+            result={'score': score, 'attempted': 2, 'total': 2, 'percentage': score * 50.0},
+        )
+
+    def snapshot(self):
+        return {
+            s.question_id: (s.served, s.correct, s.picked_a, s.picked_b, s.picked_c, s.picked_d,
+                            round(s.discrimination or 0, 6))
+            for s in QuestionStats.objects.all()
+        }
+
+    def test_incremental_updates_match_the_bulk_recompute(self):
+        for easy, hard in [('A', 'B'), ('A', 'A'), ('C', ''), ('A', 'B')]:
+            self.submit(easy, hard)
+        incremental = self.snapshot()
+        self.assertEqual(incremental[self.easy.pk][:6], (4, 3, 3, 0, 1, 0))
+        self.assertEqual(incremental[self.hard.pk][:6], (4, 2, 1, 2, 0, 0))
+        self.assertGreater(incremental[self.hard.pk][6], 0.5)
+
+        QuestionStats.objects.all().delete()
+        self.assertEqual(question_stats.rebuild(chunk_size=3), 2)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_question_list_shows_stats_without_per_row_queries(self):
+        self.submit('A', 'A')
+        User.objects.create_user('boss', password='pw', is_staff=True)
+        self.client.login(username='boss', password='pw')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('quizapp:questions_list'))
+        self.assertEqual(sum('quizapp_questionstats' in q['sql'] for q in ctx.captured_queries), 1)
+        self.assertContains(response, '<td data-label="% Right">100</td>', html=True)
+        self.assertContains(response, '<td data-label="Picks A/B/C/D">1/0/0/0</td>', html=True)
+
+
+class SettingsProfileTests(TestCase):
+    def load_settings(self, profile, values='[s.DEBUG, s.INSTALLED_APPS, len(s.MIDDLEWARE), s.QUIZ_TEMPLATE_PROFILE]',
+                      **env):
+        script = (
+            'import json, django; django.setup(); from django.conf import settings as s; '
+            f'print(json.dumps({values}))'
+        )
+        env = dict(
+            {key: value for key, value in os.environ.items() if not key.startswith(('QUIZ_', 'DJANGO_'))},
+            DJANGO_SETTINGS_MODULE='myapp.settings', QUIZ_PROFILE=profile, **env,
+        )
+        result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        return json.loads(result.stdout) if result.returncode == 0 else result.stderr
+
+    def test_worker_and_prod_profiles_turn_off_debug_and_trim_apps(self):
+        debug, apps, middleware, templates = self.load_settings('worker')
+        self.assertFalse(debug)
+        self.assertEqual(apps, ['django.contrib.auth', 'django.contrib.contenttypes', 'quizapp'])
+        self.assertEqual(middleware, 0)
+
+        debug, apps, middleware, templates = self.load_settings('prod', DJANGO_SECRET_KEY='s3cret')
+        self.assertFalse(debug)
+        self.assertNotIn('django.contrib.admin', apps)
+        self.assertEqual(templates, 'prod')
+
+        self.assertIn('requires DJANGO_SECRET_KEY', self.load_settings('prod'))
+
+    def test_prod_sessions_use_a_cache_every_worker_shares(self):
+        values = "[s.SESSION_ENGINE, s.CACHES['sessions']['BACKEND']]"
+        engine, backend = self.load_settings('prod', values, DJANGO_SECRET_KEY='s3cret')
+        self.assertEqual(engine, 'django.contrib.sessions.backends.cached_db')
+        self.assertEqual(backend, 'django.core.cache.backends.filebased.FileBasedCache')
+
+        self.assertIn('local-memory cache', self.load_settings(
+            'prod', values, DJANGO_SECRET_KEY='s3cret', QUIZ_SESSION_CACHE='locmem'))
+        engine, backend = self.load_settings('prod', values, DJANGO_SECRET_KEY='s3cret',
+                                             QUIZ_SESSION_CACHE='locmem', QUIZ_SESSION_PROFILE='db')
+        self.assertEqual(engine, 'django.contrib.sessions.backends.db')
+
+    def test_preload_compiles_templates_without_touching_the_database(self):
+        self.addCleanup(gc.unfreeze)
+        with self.assertNumQueries(0):
+            preload()
+        self.assertGreater(gc.get_freeze_count(), 0)
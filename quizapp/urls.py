@@ -1,24 +1,33 @@
+from django.conf import settings
 from django.urls import path
 
-
-from django.urls import path
+from . import async_views
 from . import views as v
 
+# Player pages and the quiz have native async versions for ASGI deployments.
+player_views = async_views if settings.QUIZ_ASYNC_VIEWS else v
+
 app_name = 'quizapp'
 
 urlpatterns = [
     path('', v.HomePageView.as_view(), name='homepage'),
     path('player/register/', v.PlayerRegisterView.as_view(), name='player_register'),
     path('player/login/', v.PlayerLoginView.as_view(), name='player_login'),
-    path('player/common/', v.PlayerCommonView.as_view(), name='player_common'),
-    path('quiz/', v.QuizPageView.as_view(), name='quiz_page'),
+    path('player/common/', player_views.PlayerCommonView.as_view(), name='player_common'),
+    path('quiz/', player_views.QuizPageView.as_view(), name='quiz_page'),
+    path('quiz/session/<int:session_id>/countdown/', async_views.quiz_countdown, name='quiz_countdown'),
+    path('quiz/session/<int:session_id>/remaining/', v.QuizRemainingView.as_view(), name='quiz_remaining'),
+    path('leaderboard/', v.LeaderboardView.as_view(), name='leaderboard'),
     path('logout/', v.UserLogoutView.as_view(), name='logout'),
 
     path('admin/login/', v.AdminLoginView.as_view(), name='admin_login'),
     path('admin/home/', v.AdminHomeView.as_view(), name='admin_home'),
     path('admin/questions/', v.QuestionListView.as_view(), name='questions_list'),
+    path('admin/questions/search/', v.QuestionSearchView.as_view(), name='search_questions'),
     path('admin/questions/add/', v.QuestionCreateView.as_view(), name='add_question'),
     path('admin/questions/edit/<int:pk>/', v.QuestionUpdateView.as_view(), name='edit_question'),
     path('admin/questions/delete/<int:pk>/', v.QuestionDeleteView.as_view(), name='delete_question'),
+    path('admin/banks/add/', v.QuestionBankCreateView.as_view(), name='add_question_bank'),
+    path('metrics/', v.MetricsView.as_view(), name='metrics'),
 
 ]
@@ -1,14 +1,30 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.forms import AuthenticationForm
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.http import urlencode
 from django.views.generic import (
     TemplateView, FormView, CreateView, UpdateView, DeleteView, ListView, View
 )
-from .forms import PlayerRegistrationForm, QuestionForm
-from .models import Question
+from . import leaderboard
+from .forms import PlayerRegistrationForm, QuestionBankForm, QuestionForm
+from .grading import grade_submission, read_answers
+from .http_cache import AnonymousPageCacheMixin, ConditionalPageMixin, invalidate_pages
+from .metrics import registry as metrics_registry
+from .models import Question, QuestionBank
+from .question_bank import bump_version, fragment_context, get_questions, sample_question_ids
+from .quiz_sessions import (
+    finish_session, get_active_session, is_expired, remaining_seconds, start_session
+)
+from .ratelimit import RateLimitMixin
+from .roles import remember_roles, resolve_roles
+from .search import search_questions
+from .tasks import submit
 
 
 # ---------------------- Mixins ----------------------
@@ -18,8 +34,7 @@ class AdminRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     login_url = reverse_lazy('quizapp:admin_login')
 
     def test_func(self):
-        user = self.request.user
-        return user.is_authenticated and (user.is_staff or hasattr(user, 'admin_profile'))
+        return self.request.user.is_authenticated and self.request.roles.is_admin
 
     def handle_no_permission(self):
         messages.error(self.request, "Only admins can access this page.")
@@ -31,23 +46,33 @@ class PlayerRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     login_url = reverse_lazy('quizapp:player_login')
 
     def test_func(self):
-        user = self.request.user
-        return user.is_authenticated and hasattr(user, 'player_profile')
+        return self.request.user.is_authenticated and self.request.roles.is_player
 
     def handle_no_permission(self):
         messages.error(self.request, "Only players can access this page.")
         return redirect('quizapp:homepage')
 
 
+class QuestionBankWriteMixin:
+    """Invalidates the cached question snapshot and pages once a question write succeeds."""
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        bump_version()
+        invalidate_pages()
+        return response
+
+
 # ---------------------- Common / Home ----------------------
 
-class HomePageView(TemplateView):
+class HomePageView(ConditionalPageMixin, AnonymousPageCacheMixin, TemplateView):
     template_name = 'quizapp/home_page.html'
+    page_cache_name = 'home'
 
     def get(self, request, *args, **kwargs):
-        if hasattr(request.user, 'admin_profile') or request.user.is_staff:
+        if request.roles.is_admin:
             return redirect('quizapp:admin_home')
-        elif hasattr(request.user, 'player_profile'):
+        elif request.roles.is_player:
             return redirect('quizapp:player_common')
         return super().get(request, *args, **kwargs)
 
@@ -55,10 +80,11 @@ class HomePageView(TemplateView):
 
 # ---------------------- Player Auth ----------------------
 
-class PlayerRegisterView(FormView):
+class PlayerRegisterView(RateLimitMixin, FormView):
     template_name = 'quizapp/player_register.html'
     form_class = PlayerRegistrationForm
     success_url = reverse_lazy('quizapp:player_login')
+    rate_limit_scope = 'register'
 
     def form_valid(self, form):
         form.save()
@@ -66,27 +92,33 @@ class PlayerRegisterView(FormView):
         return super().form_valid(form)
 
 
-class PlayerLoginView(FormView):
+class PlayerLoginView(RateLimitMixin, FormView):
     template_name = 'quizapp/player_login.html'
     form_class = AuthenticationForm
+    rate_limit_scope = 'login'
 
     def form_valid(self, form):
         user = form.get_user()
-        if hasattr(user, 'player_profile'):
+        roles = resolve_roles(user)
+        if roles.is_player:
             login(self.request, user)
+            remember_roles(self.request, user, roles)
             return redirect('quizapp:player_common')
         messages.error(self.request, "This account is not a player.")
         return self.form_invalid(form)
 
 
-class AdminLoginView(FormView):
+class AdminLoginView(RateLimitMixin, FormView):
     template_name = 'quizapp/admin_login.html'
     form_class = AuthenticationForm
+    rate_limit_scope = 'login'
 
     def form_valid(self, form):
         user = form.get_user()
-        if user.is_staff or hasattr(user, 'admin_profile'):
+        roles = resolve_roles(user)
+        if roles.is_admin:
             login(self.request, user)
+            remember_roles(self.request, user, roles)
             return redirect('quizapp:admin_home')
         messages.error(self.request, "Not an admin account.")
         return self.form_invalid(form)
@@ -94,33 +126,103 @@ class AdminLoginView(FormView):
 
 # ---------------------- Admin Section ----------------------
 
-class AdminHomeView(AdminRequiredMixin, TemplateView):
+class AdminHomeView(ConditionalPageMixin, AdminRequiredMixin, TemplateView):
     template_name = 'quizapp/admin_home.html'
 
 
 class QuestionListView(AdminRequiredMixin, ListView):
+    """
+    Keyset-paginated question bank: ``?after=<id>`` / ``?before=<id>`` seek on
+    the primary key, so a page costs one indexed range scan and no COUNT(*).
+    ``?bank=``, ``?category=`` and ``?difficulty=`` narrow the list through the
+    (bank, category, difficulty) and (category, difficulty) indexes, whose
+    entries end in the primary key, so filtered pages seek the same way.
+    Per-question stats come along in the same query.
+    """
     model = Question
     template_name = 'quizapp/questions_list.html'
     context_object_name = 'questions'
-    ordering = ['id']
-    paginate_by = 3
+    page_size = 3
+    filter_fields = ('bank', 'category', 'difficulty')
+
+    def _cursor(self, name):
+        try:
+            return int(self.request.GET[name])
+        except (KeyError, ValueError):
+            return None
+
+    def _filters(self):
+        filters = {name: self.request.GET[name] for name in self.filter_fields if self.request.GET.get(name)}
+        for name in ('bank', 'difficulty'):
+            if name in filters and not filters[name].isdigit():
+                del filters[name]
+        return filters
+
+    def get_queryset(self):
+        after, before = self._cursor('after'), self._cursor('before')
+        queryset = Question.objects.select_related('stats').filter(**self._filters())
+        if before is not None:
+            rows = list(queryset.filter(id__lt=before).order_by('-id')[:self.page_size + 1])
+            self.has_previous = len(rows) > self.page_size
+            self.has_next = True
+            return rows[:self.page_size][::-1]
+
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+        rows = list(queryset.order_by('id')[:self.page_size + 1])
+        self.has_previous = after is not None
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        questions = context['questions']
+        filters = self._filters()
+        context.update({
+            'has_previous': self.has_previous and bool(questions),
+            'has_next': self.has_next,
+            'first_id': questions[0].id if questions else None,
+            'last_id': questions[-1].id if questions else None,
+            'filters': filters,
+            'filter_query': urlencode(filters),
+            'banks': QuestionBank.objects.order_by('name'),
+            'difficulties': Question.DIFFICULTY_CHOICES,
+        })
+        return context
+
+
+class QuestionSearchView(AdminRequiredMixin, ListView):
+    template_name = 'quizapp/questions_list.html'
+    context_object_name = 'questions'
+    limit = 50
+
+    def get_queryset(self):
+        return search_questions(
+            self.request.GET.get('q', ''), limit=self.limit,
+            queryset=Question.objects.select_related('stats'),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['search_query'] = self.request.GET.get('q', '')
+        return context
 
 
-class QuestionCreateView(AdminRequiredMixin, CreateView):
+class QuestionCreateView(AdminRequiredMixin, QuestionBankWriteMixin, CreateView):
     model = Question
     form_class = QuestionForm
     template_name = 'quizapp/add_question.html'
     success_url = reverse_lazy('quizapp:questions_list')
 
 
-class QuestionUpdateView(AdminRequiredMixin, UpdateView):
+class QuestionUpdateView(AdminRequiredMixin, QuestionBankWriteMixin, UpdateView):
     model = Question
     form_class = QuestionForm
     template_name = 'quizapp/add_question.html'
     success_url = reverse_lazy('quizapp:questions_list')
 
     def dispatch(self, request, *args, **kwargs):
-        if not (request.user.is_staff or hasattr(request.user, 'admin_profile')):
+        if not request.roles.is_admin:
             messages.error(request, "Unauthorized access.")
             return redirect('quizapp:homepage')
         return super().dispatch(request, *args, **kwargs)
@@ -130,13 +232,13 @@ class QuestionUpdateView(AdminRequiredMixin, UpdateView):
         return super().form_valid(form)
 
 
-class QuestionDeleteView(AdminRequiredMixin, DeleteView):
+class QuestionDeleteView(AdminRequiredMixin, QuestionBankWriteMixin, DeleteView):
     model = Question
     template_name = 'quizapp/delete_confirmation.html'
     success_url = reverse_lazy('quizapp:questions_list')
 
     def dispatch(self, request, *args, **kwargs):
-        if not (request.user.is_staff or hasattr(request.user, 'admin_profile')):
+        if not request.roles.is_admin:
             messages.error(request, "Unauthorized access.")
             return redirect('quizapp:homepage')
         return super().dispatch(request, *args, **kwargs)
@@ -146,43 +248,105 @@ class QuestionDeleteView(AdminRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+class QuestionBankCreateView(AdminRequiredMixin, CreateView):
+    """Banks group questions; the Django admin site is not installed in prod."""
+    model = QuestionBank
+    form_class = QuestionBankForm
+    template_name = 'quizapp/add_question_bank.html'
+    success_url = reverse_lazy('quizapp:add_question')
+
+    def form_valid(self, form):
+        messages.success(self.request, f"Question bank {form.instance.name!r} created.")
+        return super().form_valid(form)
+
+
 # ---------------------- Player Section ----------------------
 
-class PlayerCommonView(PlayerRequiredMixin, TemplateView):
+class PlayerCommonView(ConditionalPageMixin, PlayerRequiredMixin, TemplateView):
     template_name = 'quizapp/player_common.html'
 
 
-class QuizPageView(PlayerRequiredMixin, View):
+class QuizPageView(ConditionalPageMixin, RateLimitMixin, PlayerRequiredMixin, View):
+    rate_limit_scope = 'quiz_submit'
+
+    def etag_parts(self, request):
+        # Revisiting an unfinished, unexpired quiz replays the page that
+        # started it; anything else starts a new quiz.
+        session_id = request.session.get('quiz_session_id')
+        quiz_session = get_active_session(session_id) if session_id else None
+        if quiz_session is None or is_expired(quiz_session):
+            return None
+        return (quiz_session.id,)
+
     def get(self, request):
-        questions = Question.objects.all()[:5]
-        return render(request, 'quizapp/quiz_page.html', {'questions': questions})
+        question_ids = sample_question_ids()
+        quiz_session = start_session(request.user, request.user.player_profile.id, question_ids)
+        request.session['quiz_session_id'] = quiz_session.id
+        questions = get_questions(question_ids)
+        return render(request, 'quizapp/quiz_page.html', {
+            'questions': questions,
+            'quiz_session': quiz_session,
+            'remaining': remaining_seconds(quiz_session),
+            **fragment_context(),
+        })
 
     def post(self, request):
-        questions = Question.objects.all()[:5]
-        total_questions = len(questions)
-        score = 0
-        attempted = 0
-
-        for q in questions:
-            ans = request.POST.get(f'question_{q.id}')
-            if ans:
-                attempted += 1
-                if ans == q.correct:
-                    score += 1
-
-        not_attempted = total_questions - attempted
-        percentage = round((score / total_questions) * 100, 2) if total_questions > 0 else 0
-
-        context = {
-            'score': score,
-            'total': total_questions,
-            'attempted': attempted,
-            'not_attempted': not_attempted,
-            'percentage': percentage,
-        }
+        session_id = request.session.pop('quiz_session_id', None)
+        quiz_session = get_active_session(session_id) if session_id else None
+        if quiz_session is None:
+            messages.error(request, "Please start the quiz before submitting.")
+            return redirect('quizapp:quiz_page')
+        if is_expired(quiz_session):
+            finish_session(quiz_session)
+            messages.error(request, "Time is up; this quiz can no longer be submitted.")
+            return redirect('quizapp:player_common')
+
+        questions = get_questions(quiz_session.question_ids)
+        answers = read_answers(request.POST, questions)
+        result = grade_submission(questions, answers)
+        context = dict(result, not_attempted=result['total'] - result['attempted'])
+        submit(quiz_session, questions, answers, result)
         return render(request, 'quizapp/quiz_result.html', context)
 
 
+class QuizRemainingView(View):
+    """
+    Seconds left in the player's quiz session as JSON. The quiz page asks for
+    it on load because a copy revalidated with a 304 carries the time left
+    when it was first rendered. Served from the cached session only.
+    """
+
+    def get(self, request, session_id):
+        quiz_session = get_active_session(session_id)
+        if quiz_session is None or quiz_session.user_id != request.user.pk:
+            raise Http404("No active quiz session.")
+        response = JsonResponse({'remaining': remaining_seconds(quiz_session)})
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class LeaderboardView(PlayerRequiredMixin, TemplateView):
+    template_name = 'quizapp/leaderboard.html'
+    paginate_by = 10
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        top = leaderboard.get_top()
+        try:
+            page = max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        start = (page - 1) * self.paginate_by
+        context.update({
+            'entries': top[start:start + self.paginate_by],
+            'start_rank': start + 1,
+            'page': page,
+            'has_previous': page > 1,
+            'has_next': start + self.paginate_by < len(top),
+        })
+        return context
+
+
 # ---------------------- Logout ----------------------
 
 class UserLogoutView(LoginRequiredMixin, View):
@@ -191,3 +355,23 @@ class UserLogoutView(LoginRequiredMixin, View):
         messages.info(request, "You have been logged out successfully.")
         return redirect('quizapp:homepage')
 
+
+# ---------------------- Monitoring ----------------------
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint. Open to staff users, or to any client sending
+    ``Authorization: Bearer <QUIZ_METRICS_TOKEN>`` when that setting is set.
+    """
+
+    def get(self, request):
+        if not (request.user.is_authenticated and request.user.is_staff or self._has_token(request)):
+            return HttpResponseForbidden()
+        return HttpResponse(
+            metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+    def _has_token(self, request):
+        token = getattr(settings, 'QUIZ_METRICS_TOKEN', '')
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        return bool(token) and scheme == 'Bearer' and constant_time_compare(value, token)